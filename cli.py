@@ -0,0 +1,364 @@
+# Командная строка для обучения и предсказания без графического интерфейса.
+# Модуль не импортирует Qt, поэтому подходит для cron и серверов без дисплея
+import argparse
+import contextlib
+import sys
+
+from logic import *
+from config import *
+
+
+def train_command(args:argparse.Namespace) -> int:
+    '''
+    Обучает модель и сохраняет ее
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды train
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    restore_integrity()
+    try:
+        # Гармоническая модель решается без эпох, обратные вызовы Keras ей не нужны
+        if get_model_type(args.model_id) == MODEL_TYPE_HARMONIC:
+            callbacks = []
+        else:
+            callbacks = get_stop_callbacks(args.time_budget, args.patience, args.min_delta)
+        history, model, evaluate_res, scalers = train_model(
+            args.model_id, args.filename, args.epochs, verbose=args.verbose, callbacks=callbacks, resume=args.resume,
+            incremental=args.incremental
+        )
+        save_trained_model(args.model_id, model, scalers, evaluate_res, args.filename)
+        delete_checkpoint(args.model_id)
+    except Exception as e:
+        print(f"Ошибка обучения модели {args.model_id}: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Модель {args.model_id} обучена: эпох {len(history.history['loss'])}, "
+          f"MAE {evaluate_res['mae']:.3f}, MSE {evaluate_res['mse']:.3f} ({get_stop_reason(callbacks)})")
+    return 0
+
+
+def queue_command(args:argparse.Namespace) -> int:
+    '''
+    Обучает несколько моделей параллельно в пуле процессов и выводит состояние каждого задания
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды queue
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    from training_queue import TrainingQueue
+
+    restore_integrity()
+    model_ids = args.model_ids or list(get_models())
+    training_queue = TrainingQueue(args.workers, args.threads)
+    for model_id in dict.fromkeys(model_ids):
+        training_queue.submit(
+            model_id, args.filename, args.epochs, resume=args.resume, incremental=args.incremental,
+            time_budget=args.time_budget, patience=args.patience, min_delta=args.min_delta
+        )
+
+    print(f"Заданий: {len(training_queue.jobs)}, процессов: {training_queue.workers}, потоков на процесс: {training_queue.threads}")
+
+    def print_job(job):
+        line = f"[{job['job_id'] + 1}/{len(training_queue.jobs)}] {job['model_id']}: {job['status']}"
+        if job["status"] == JOB_STATUS_DONE:
+            line += f", эпох {job['epoch']}, MAE {job['mae']:.3f}, MSE {job['mse']:.3f}, {job['seconds']:.1f} с ({job['stop_reason']})"
+        elif job["status"] == JOB_STATUS_FAILED:
+            line += f": {job['error']}"
+        print(line, flush=True)
+
+    try:
+        training_queue.wait(print_job)
+    except KeyboardInterrupt:
+        print("Очередь остановлена, задания в очереди отменены", file=sys.stderr)
+        return 1
+    finally:
+        training_queue.close()
+
+    summary = training_queue.get_summary()
+    print(f"Готово: {summary[JOB_STATUS_DONE]}, с ошибкой: {summary[JOB_STATUS_FAILED]}, "
+          f"время {summary['elapsed']:.1f} с, {summary['jobs_per_minute']:.1f} моделей в минуту")
+    return 1 if summary[JOB_STATUS_FAILED] else 0
+
+
+def sweep_command(args:argparse.Namespace) -> int:
+    '''
+    Подбирает гиперпараметры полносвязной модели и выводит лучшие варианты
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды sweep
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    from sweep import get_sweep_trials, run_sweep, save_leaderboard, register_sweep_result
+
+    trials = get_sweep_trials(args.units, args.learning_rates, args.batch_sizes, args.epochs, args.trials)
+    print(f"Вариантов: {len(trials)}")
+
+    def print_trial(result):
+        line = (f"[{result['trial_id'] + 1}/{len(trials)}] слои {result['units']}, lr {result['learning_rate']}, "
+                f"пакет {result['batch_size']}: {result['status']}")
+        if result["status"] == TRIAL_STATUS_FAILED:
+            line += f": {result['error']}"
+        else:
+            line += f" на эпохе {result['epochs_done']}, MAE отбора {result['val_mae']:.3f}, MAE {result['mae']:.3f}"
+        print(line, flush=True)
+
+    try:
+        leaderboard = run_sweep(args.filename, trials, args.workers, args.threads, print_trial)
+    except Exception as e:
+        print(f"Ошибка подбора гиперпараметров: {e}", file=sys.stderr)
+        return 1
+
+    print("\nЛучшие варианты:")
+    print("слои\tlr\tпакет\tэпох\tMAE отбора\tMAE\tMSE\tсостояние")
+    for result in leaderboard[:SWEEP_LEADERBOARD_SIZE]:
+        if result["status"] == TRIAL_STATUS_FAILED:
+            continue
+        print(f"{'-'.join(map(str, result['units']))}\t{result['learning_rate']}\t{result['batch_size']}\t"
+              f"{result['epochs_done']}\t{result['val_mae']:.3f}\t{result['mae']:.3f}\t{result['mse']:.3f}\t{result['status']}")
+
+    if args.output:
+        save_leaderboard(leaderboard, args.output)
+
+    if args.register:
+        if not leaderboard or leaderboard[0]["status"] != TRIAL_STATUS_DONE:
+            print("Ни один вариант не обучился полностью, модель не добавлена", file=sys.stderr)
+            return 1
+        model_id = register_sweep_result(leaderboard[0], args.register)
+        print(f"Лучший вариант добавлен как модель {model_id}")
+    return 0
+
+
+def cv_command(args:argparse.Namespace) -> int:
+    '''
+    Проводит перекрестную проверку архитектуры модели и выводит среднее и разброс метрик
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды cv
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    from cross_validation import cross_validate
+
+    restore_integrity()
+
+    def print_fold(result):
+        line = f"Разбиение {result['fold'] + 1}/{args.folds} (обучение {result['train_size']}, проверка {result['test_size']} мес.): "
+        if "error" in result:
+            line += f"ошибка: {result['error']}"
+        else:
+            line += f"MAE {result['mae']:.3f}, MSE {result['mse']:.3f}, {result['seconds']:.1f} с"
+        print(line, flush=True)
+
+    try:
+        summary = cross_validate(
+            args.model_id, args.filename, args.epochs, args.folds, args.mode, args.workers, args.threads, print_fold
+        )
+    except Exception as e:
+        print(f"Ошибка перекрестной проверки модели {args.model_id}: {e}", file=sys.stderr)
+        return 1
+
+    if summary["mae"] is None:
+        print("Ни одно разбиение не обучилось", file=sys.stderr)
+        return 1
+
+    spread = lambda metric: "" if summary[metric + "_std"] is None else f" ± {summary[metric + '_std']:.3f}"
+    print(f"MAE {summary['mae']:.3f}{spread('mae')}, MSE {summary['mse']:.3f}{spread('mse')}")
+    return 1 if any("error" in result for result in summary["folds"]) else 0
+
+
+def predict_command(args:argparse.Namespace) -> int:
+    '''
+    Предсказывает температуру по месяцам заданных лет и записывает ее в CSV
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды predict
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    years = args.years or range(INPUT_YEAR_VALUE_FROM, INPUT_YEAR_VALUE_TO + 1)
+    # Сообщения logic уходят в поток ошибок, чтобы не смешиваться с CSV в стандартном выводе
+    with contextlib.redirect_stdout(sys.stderr):
+        restore_integrity()
+        predictions = predict_temperatures(args.model_ids, years)
+    if predictions.empty:
+        print("Ни одна модель не загрузилась", file=sys.stderr)
+        return 1
+
+    output = sys.stdout if args.output == "-" else args.output
+    predictions.to_csv(output, sep=";", index=False, float_format="%.3f")
+    return 0
+
+
+def create_command(args:argparse.Namespace) -> int:
+    '''
+    Добавляет в реестр новую необученную модель и выводит ее id
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды create
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    restore_integrity()
+    description = args.description
+    if description is None:
+        description = DEFAULT_HARMONIC_DESCRIPTION if args.type == MODEL_TYPE_HARMONIC else DEFAULT_DESCRIPTION
+    print(create_model(args.name, description, args.type))
+    return 0
+
+
+def list_command(args:argparse.Namespace) -> int:
+    '''
+    Выводит id, названия, типы, описания и MAE моделей
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды list
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    for model_id, model_data in get_models().items():
+        description = model_data["description"].replace("\n", " ")
+        mae = "-" if model_data["mae"] is None else f"{model_data['mae']:.3f}"
+        print(f"{model_id}\t{model_data['name']}\t{model_data['model_type'] or '-'}\t{description}\t{mae}")
+    return 0
+
+
+def compact_command(args:argparse.Namespace) -> int:
+    '''
+    Переводит модели в хранилище по хэшу и удаляет лишние файлы моделей
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды compact
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    stats = compact_model_storage()
+    print(f"Переведено моделей: {stats['migrated']}, не удалось перевести: {stats['failed']}, "
+          f"удалено файлов: {stats['removed_files']}")
+    print(f"Размер файлов моделей: {stats['size_before']} -> {stats['size_after']} байт")
+    return 1 if stats["failed"] else 0
+
+
+def serve_command(args:argparse.Namespace) -> int:
+    '''
+    Запускает локальный HTTP-сервер предсказаний
+            Параметры:
+                    args(argparse.Namespace): аргументы подкоманды serve
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    from server import run_server
+
+    run_server(args.host, args.port, args.warm_up, args.threads)
+    return 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    '''
+    Возвращает разбор аргументов командной строки
+            Возвращаемое значение:
+                    parser(argparse.ArgumentParser): разбор аргументов с подкомандами
+    '''
+
+    parser = argparse.ArgumentParser(prog="main.py", description=APP_TITLE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="обучить модель на файле с данными")
+    train_parser.add_argument("model_id", help="id модели")
+    train_parser.add_argument("filename", help="файл rp5 (.txt или .csv)")
+    train_parser.add_argument("--epochs", type=int, default=int(EPOCHS_DEFAULT_VALUE), help="количество эпох")
+    train_parser.add_argument("--resume", action="store_true", help="продолжить с контрольной точки")
+    train_parser.add_argument("--incremental", action="store_true",
+                              help=f"дообучить на новых и изменившихся месяцах (не больше {INCREMENTAL_EPOCHS} эпох)")
+    train_parser.add_argument("--time-budget", type=float, default=None, help="ограничение времени обучения в секундах")
+    train_parser.add_argument("--patience", type=int, default=None, help="остановить, если потери не уменьшаются столько эпох")
+    train_parser.add_argument("--min-delta", type=float, default=float(EARLY_STOPPING_MIN_DELTA_DEFAULT_VALUE),
+                              help="минимальное уменьшение потерь для ранней остановки")
+    train_parser.add_argument("--verbose", type=int, default=1, choices=[0, 1, 2], help="подробность вывода Keras")
+    train_parser.set_defaults(handler=train_command)
+
+    queue_parser = subparsers.add_parser("queue", help="обучить несколько моделей параллельно")
+    queue_parser.add_argument("filename", help="файл rp5 (.txt или .csv)")
+    queue_parser.add_argument("model_ids", nargs="*", help="id моделей (по умолчанию все модели реестра)")
+    queue_parser.add_argument("--epochs", type=int, default=int(EPOCHS_DEFAULT_VALUE), help="количество эпох")
+    queue_parser.add_argument("--workers", type=int, default=None, help="количество процессов (по умолчанию по числу ядер)")
+    queue_parser.add_argument("--threads", type=int, default=TRAINING_WORKER_THREADS, help="потоков TensorFlow на процесс")
+    queue_parser.add_argument("--resume", action="store_true", help="продолжить с контрольных точек")
+    queue_parser.add_argument("--incremental", action="store_true", help="дообучить на новых и изменившихся месяцах")
+    queue_parser.add_argument("--time-budget", type=float, default=None, help="ограничение времени обучения одной модели в секундах")
+    queue_parser.add_argument("--patience", type=int, default=None, help="остановить, если потери не уменьшаются столько эпох")
+    queue_parser.add_argument("--min-delta", type=float, default=float(EARLY_STOPPING_MIN_DELTA_DEFAULT_VALUE),
+                              help="минимальное уменьшение потерь для ранней остановки")
+    queue_parser.set_defaults(handler=queue_command)
+
+    sweep_parser = subparsers.add_parser("sweep", help="подобрать гиперпараметры полносвязной модели")
+    sweep_parser.add_argument("filename", help="файл rp5 (.txt или .csv)")
+    sweep_parser.add_argument("--units", type=lambda value: tuple(int(units) for units in value.split(",")), nargs="+",
+                              default=SWEEP_UNITS, help="варианты скрытых слоев, например 64,32 128,64,32")
+    sweep_parser.add_argument("--learning-rates", type=float, nargs="+", default=SWEEP_LEARNING_RATES, help="варианты скорости обучения")
+    sweep_parser.add_argument("--batch-sizes", type=int, nargs="+", default=SWEEP_BATCH_SIZES, help="варианты размера пакета")
+    sweep_parser.add_argument("--epochs", type=int, nargs="+", default=SWEEP_EPOCHS, help="варианты количества эпох")
+    sweep_parser.add_argument("--trials", type=int, default=None, help="сколько случайных вариантов проверить (по умолчанию все)")
+    sweep_parser.add_argument("--workers", type=int, default=None, help="количество процессов (по умолчанию по числу ядер)")
+    sweep_parser.add_argument("--threads", type=int, default=TRAINING_WORKER_THREADS, help="потоков TensorFlow на процесс")
+    sweep_parser.add_argument("-o", "--output", default=None, help="файл CSV для таблицы результатов")
+    sweep_parser.add_argument("--register", metavar="NAME", default=None, help="добавить лучший вариант как модель с этим именем")
+    sweep_parser.set_defaults(handler=sweep_command)
+
+    cv_parser = subparsers.add_parser("cv", help="перекрестная проверка архитектуры модели")
+    cv_parser.add_argument("model_id", help="id модели")
+    cv_parser.add_argument("filename", help="файл rp5 (.txt или .csv)")
+    cv_parser.add_argument("--folds", type=int, default=CV_FOLDS_DEFAULT, help="количество разбиений")
+    cv_parser.add_argument("--mode", choices=CV_MODES, default=CV_MODE_DEFAULT,
+                           help="timeseries - проверка на следующем отрезке времени, kfold - на случайных частях")
+    cv_parser.add_argument("--epochs", type=int, default=int(EPOCHS_DEFAULT_VALUE), help="количество эпох на каждом разбиении")
+    cv_parser.add_argument("--workers", type=int, default=None, help="количество процессов (по умолчанию по числу ядер)")
+    cv_parser.add_argument("--threads", type=int, default=TRAINING_WORKER_THREADS, help="потоков TensorFlow на процесс")
+    cv_parser.set_defaults(handler=cv_command)
+
+    predict_parser = subparsers.add_parser("predict", help="предсказать температуру по месяцам и записать в CSV")
+    predict_parser.add_argument("model_ids", nargs="+", help="id моделей")
+    predict_parser.add_argument("--years", type=int, nargs="+", default=None,
+                                help=f"годы (по умолчанию {INPUT_YEAR_VALUE_FROM}-{INPUT_YEAR_VALUE_TO})")
+    predict_parser.add_argument("-o", "--output", default="-", help="файл CSV (по умолчанию стандартный вывод)")
+    predict_parser.set_defaults(handler=predict_command)
+
+    create_parser = subparsers.add_parser("create", help="добавить новую необученную модель")
+    create_parser.add_argument("name", help="название модели")
+    create_parser.add_argument("--description", default=None, help="описание модели")
+    create_parser.add_argument("--type", choices=MODEL_TYPES, default=MODEL_TYPE_KERAS,
+                               help="harmonic - гармоническая регрессия без нейросети, keras - нейросеть стандартной архитектуры")
+    create_parser.set_defaults(handler=create_command)
+
+    list_parser = subparsers.add_parser("list", help="показать модели")
+    list_parser.set_defaults(handler=list_command)
+
+    compact_parser = subparsers.add_parser("compact", help="перевести модели в хранилище по хэшу и удалить лишние файлы")
+    compact_parser.set_defaults(handler=compact_command)
+
+    serve_parser = subparsers.add_parser("serve", help="запустить HTTP-сервер предсказаний")
+    serve_parser.add_argument("--host", default=SERVER_HOST, help="адрес")
+    serve_parser.add_argument("--port", type=int, default=SERVER_PORT, help="порт")
+    serve_parser.add_argument("--warm-up", type=int, default=SERVER_WARM_UP_MODELS,
+                              help=f"сколько первых моделей реестра загрузить при запуске (не больше {MODEL_CACHE_SIZE})")
+    serve_parser.add_argument("--threads", type=int, default=SERVER_THREADS, help="сколько потоков обрабатывают запросы")
+    serve_parser.set_defaults(handler=serve_command)
+
+    return parser
+
+
+def run_cli(argv:list[str]) -> int:
+    '''
+    Выполняет подкоманду командной строки
+            Параметры:
+                    argv(list[str]): аргументы без имени программы
+            Возвращаемое значение:
+                    code(int): код завершения
+    '''
+
+    args = get_parser().parse_args(argv)
+    return args.handler(args)
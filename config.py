@@ -5,9 +5,16 @@ from additional_functions import resource_path
 # Пути к файлам
 # ==========================================================================
 
-MODELS_DESCRIPTION_FILENAME = "src\\models.json"
+MODELS_DESCRIPTION_FILENAME = "src\\models.json" # Старый файл описания моделей, из него заполняется новый реестр
+MODELS_REGISTRY_PATH = "src\\models.db"
 MODELS_DIRECTORY_PATH = "src\\models"
+MODEL_BLOBS_DIRECTORY_PATH = "src\\models\\blobs" # Файлы моделей по хэшу содержимого
+MODEL_ARTIFACT_EXTENSION = ".wpm" # Файл модели: веса, нормализация и сведения об обучении в одном архиве
+MODEL_ARTIFACT_FORMAT_VERSION = 1
 STANDARD_TRAIN_DATA_PATH = "src\\data\\Temperature20142024MoscowVDNH.txt"
+TRAIN_DATA_CACHE_DIRECTORY_PATH = "src\\data\\cache"
+STARTUP_TIMES_LOG_PATH = "src\\startup_times.csv"
+WEATHER_SUMMARY_CACHE_PATH = "src\\weather_summary.json"
 
 LOGO_IMAGE_PATH = "src\\assets\\main_logo.png"
 TEMPERATURE_ICON_PATH = "src\\assets\\temperature_icon.svg"
@@ -44,7 +51,8 @@ LOGO_SIZE = 60
 
 # Температура за текущий месяц
 LOADING_LABEL_TEMPLATE = "Загрузка прогноза..."
-WEATHER_SUMMARY_LABEL_TEMPLATE = "Средняя температура на {0} 2025 года\n(по стандартной модели):"
+WEATHER_SUMMARY_LABEL_TEMPLATE = "Средняя температура на {0} {1} года\n(по стандартной модели):"
+WEATHER_SUMMARY_YEAR = 2025
 TEMP_ICON_SIZE = 50
 
 # Темы приложения
@@ -63,6 +71,11 @@ MODELS_TAB_NAME = "Модели"
 # Размеры карточек моделей
 MODEL_CARD_WIDTH = 220
 MODEL_CARD_HEIGHT = 150
+MODEL_CARDS_SPACING = 15
+
+# Поиск по моделям: слова ищутся в имени и описании, метрики можно сравнивать, например mae<1.5
+MODEL_SEARCH_PLACEHOLDER = "Поиск: имя, описание или условие вроде mae<1.5"
+MODEL_SEARCH_METRICS = ("mae", "mse")
 
 # Названия кнопок карточек моделей
 TRAIN_BUTTON_TEXT = "Обучить"
@@ -84,6 +97,10 @@ WEATHER_SUMMARY_CANT_DISPLAY = "Прогноз недоступен: станд
 # Кнопка внизу вкладки для добавления новых моделей
 LOAD_MODEL_WINDOW_TITLE = "Добавить модель"
 
+# Кнопка для создания гармонической модели, которая обучается без Keras
+CREATE_HARMONIC_MODEL_BUTTON_TEXT = "Создать быструю модель"
+DEFAULT_HARMONIC_DESCRIPTION = "Годовой цикл и линейный тренд, обучается мгновенно"
+
 # ==========================================================================
 # Диалоговые окна
 # ==========================================================================
@@ -134,6 +151,26 @@ TRAIN_FILE_WINDOW_TITLE = "Выбор файла для обучения"
 EPOCH_INPUT_TITLE = "Количество эпох:"
 EPOCHS_DEFAULT_VALUE = "100" # Количество эпох по умолчанию
 
+# Ограничение времени обучения
+TIME_BUDGET_TITLE = "Ограничить время обучения (с):"
+TIME_BUDGET_DEFAULT_VALUE = "60"
+
+# Ранняя остановка, когда потери на проверочных данных перестают уменьшаться
+EARLY_STOPPING_TITLE = "Ранняя остановка, эпох без улучшения:"
+EARLY_STOPPING_PATIENCE_DEFAULT_VALUE = "10"
+EARLY_STOPPING_MIN_DELTA_TITLE = "Минимальное улучшение потерь:"
+EARLY_STOPPING_MIN_DELTA_DEFAULT_VALUE = "0.0001"
+
+# Продолжение обучения с контрольной точки
+RESUME_TRAIN_TITLE = "Продолжить с эпохи {0} из {1}"
+
+# Модель, которая обучается, удалить нельзя
+DELETE_MODEL_WINDOW_TITLE = "Удаление модели"
+DELETE_WHILE_TRAINING_TEXT = "Модель «{0}» обучается, удалить ее можно после окончания или остановки обучения"
+
+# Дообучение обученной модели только на новых и изменившихся месяцах
+INCREMENTAL_TRAIN_TITLE = "Дообучить на новых месяцах"
+
 # Кнопка
 START_TRAIN_BUTTON_TEXT = "Начать обучение"
 
@@ -147,6 +184,26 @@ TRAIN_WINDOW_TITLE = "Обучение модели"
 # Сообщения сверху
 TRAIN_WAITING_LABEL_TEXT = "Происходит обучение модели. Пожалуйста, ожидайте"
 
+TRAIN_PROGRESS_LABEL_TEXT = "Эпоха {0} из {1}, потери: {2:.4f}\n" \
+"Прошло: {3:.0f} с, осталось примерно: {4:.0f} с"
+
+TRAIN_FAILED_LABEL_TEXT = "Не удалось обучить модель: {0}"
+
+TRAIN_CANCELLED_LABEL_TEXT = "Обучение остановлено на эпохе {0}.\n" \
+"Прогресс сохранён, обучение можно продолжить с этого места"
+TRAIN_CANCELLED_NOT_SAVED_LABEL_TEXT = "Обучение остановлено на эпохе {0}.\n" \
+"Прогресс не сохранён, модель осталась прежней"
+
+# Кнопка остановки обучения
+CANCEL_TRAIN_BUTTON_TEXT = "Остановить обучение"
+
+# Причины остановки обучения
+STOP_REASON_LABEL_TEXT = "Причина остановки: {0}"
+STOP_REASON_EPOCHS = "пройдены все эпохи"
+STOP_REASON_TIME_BUDGET = "истекло отведённое время"
+STOP_REASON_CONVERGED = "потери перестали уменьшаться"
+STOP_REASON_CANCELLED = "обучение остановлено пользователем"
+
 TRAIN_DONE_LABEL_TEXT = "Спасибо за ожидание, обучение завершено! \n" \
 "Обученная модель сохранена во внутренних файлах программы.\n\n" \
 "Вы можете дополнительно сохранить её на жесткий диск"
@@ -214,6 +271,119 @@ SAVE_RESULT_BUTTON = "Сохранить результат"
 # Названия окна для сохранения предсказния
 SAVE_RESULT_WINDOW_TITLE = "Сохранения результата предсказания"
 
+# ==========================================================================
+# Обучение модели
+# ==========================================================================
+
+# Название колонки времени в выгрузках rp5 (используется, если нет колонки 'timestamp')
+RP5_TIMESTAMP_COLUMN = "Местное время в Москве (ВДНХ)"
+
+# Количество строк, которое читается из файла с данными за один раз
+TRAIN_DATA_CHUNK_SIZE = 100000
+
+# Доля месяцев, которые откладываются для оценки модели
+TRAIN_TEST_SIZE = 0.25
+
+# Зерно случайного разбиения на обучающие и проверочные данные
+TRAIN_SPLIT_RANDOM_STATE = 42
+
+# Доля обучающих месяцев, по которым ранняя остановка выбирает лучшую эпоху
+TRAIN_VALIDATION_SIZE = 0.1
+
+# Через сколько эпох сохранять контрольную точку обучения
+TRAIN_CHECKPOINT_EVERY = 10
+
+# Дообучение: максимум эпох, сколько старых месяцев повторять вместе с новыми
+# и на сколько должна отличаться средняя температура месяца, чтобы он считался изменившимся
+INCREMENTAL_EPOCHS = 10
+INCREMENTAL_REPLAY_SIZE = 64
+INCREMENTAL_CHANGE_TOLERANCE = 1e-6
+
+# Архитектура стандартной модели: нейроны скрытых слоев, активация и скорость обучения
+STANDARD_MODEL_UNITS = (64, 32)
+STANDARD_MODEL_ACTIVATION = "relu"
+STANDARD_MODEL_LEARNING_RATE = 0.01
+
+# Типы моделей: нейросеть Keras и гармоническая регрессия (годовой цикл и линейный тренд, без Keras)
+MODEL_TYPE_KERAS = "keras"
+MODEL_TYPE_HARMONIC = "harmonic"
+MODEL_TYPES = (MODEL_TYPE_KERAS, MODEL_TYPE_HARMONIC)
+
+# Количество гармоник годового цикла в гармонической регрессии
+HARMONIC_MODEL_HARMONICS = 3
+
+# Максимальный размер кэша разобранных файлов с данными (в байтах)
+TRAIN_DATA_CACHE_MAX_SIZE = 50 * 1024 * 1024
+
+# Размер блока файла, который берется для хэша содержимого (в байтах)
+TRAIN_DATA_HASH_BLOCK_SIZE = 1024 * 1024
+
+# ==========================================================================
+# Очередь обучения
+# ==========================================================================
+
+TRAINING_QUEUE_WORKERS = None # Количество процессов обучения (None - по числу ядер)
+TRAINING_WORKER_THREADS = 1 # Сколько потоков TensorFlow может занять один процесс
+TRAINING_QUEUE_POLL_INTERVAL = 0.2 # Как часто проверять состояние заданий (в секундах)
+
+# Состояния заданий обучения
+JOB_STATUS_QUEUED = "в очереди"
+JOB_STATUS_RUNNING = "обучается"
+JOB_STATUS_DONE = "готово"
+JOB_STATUS_FAILED = "ошибка"
+
+# ==========================================================================
+# Подбор гиперпараметров
+# ==========================================================================
+
+# Пространство поиска по умолчанию: варианты скрытых слоев, скорости обучения, размера пакета и числа эпох
+SWEEP_UNITS = ((32,), (64, 32), (128, 64), (64, 64, 32))
+SWEEP_LEARNING_RATES = (0.01, 0.003, 0.001)
+SWEEP_BATCH_SIZES = (16, 32)
+SWEEP_EPOCHS = (100,)
+
+SWEEP_RANDOM_SEED = 42 # Зерно для выбора вариантов и весов моделей
+SWEEP_PRUNE_EVERY = 10 # Через сколько эпох сравнивать вариант с остальными
+SWEEP_PRUNE_WARMUP = 20 # До какой эпохи варианты не останавливаются
+SWEEP_PRUNE_MIN_TRIALS = 3 # Сколько вариантов должно пройти эпоху, чтобы по ней останавливать
+SWEEP_LEADERBOARD_SIZE = 10 # Сколько лучших вариантов выводить
+
+# Состояния вариантов
+TRIAL_STATUS_DONE = "готово"
+TRIAL_STATUS_PRUNED = "остановлен"
+TRIAL_STATUS_FAILED = "ошибка"
+
+# ==========================================================================
+# Перекрестная проверка
+# ==========================================================================
+
+CV_FOLDS_DEFAULT = 5
+# timeseries - обучение на прошлом, проверка на следующем за ним отрезке; kfold - случайные части
+CV_MODES = ("timeseries", "kfold")
+CV_MODE_DEFAULT = "timeseries"
+
+# ==========================================================================
+# Кэш загруженных моделей
+# ==========================================================================
+
+# Сколько моделей держать загруженными в памяти
+MODEL_CACHE_SIZE = 8
+
+# Ограничение памяти под загруженные модели (в байтах, оценивается по размеру файлов)
+MODEL_CACHE_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# ==========================================================================
+# Сервер предсказаний
+# ==========================================================================
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_BATCH_WINDOW = 0.002 # Сколько секунд ждать запросы для общего пакета
+SERVER_MAX_BATCH_SIZE = 256 # Максимальное количество запросов в пакете
+SERVER_STATS_WINDOW = 10000 # По скольким последним запросам считать задержку
+SERVER_THREADS = 8 # Сколько потоков обрабатывают запросы
+SERVER_WARM_UP_MODELS = MODEL_CACHE_SIZE # Сколько первых моделей реестра загрузить при запуске (больше кэш не удержит)
+
 # ==========================================================================
 # Прочие настройки
 # ==========================================================================
@@ -0,0 +1,167 @@
+# Перекрестная проверка модели: архитектура модели обучается заново на нескольких разбиениях данных,
+# части обучаются параллельно в пуле процессов очереди обучения. Файл с данными разбирается один раз.
+# Гармоническая регрессия решается за миллисекунды, поэтому ее разбиения считаются в текущем процессе без пула и TensorFlow
+import json
+import time
+import numpy as np
+
+from concurrent.futures import as_completed
+
+from logic import *
+from training_queue import create_worker_pool, get_workers_count
+from config import *
+
+
+def get_cv_splits(count:int, folds:int=CV_FOLDS_DEFAULT, mode:str=CV_MODE_DEFAULT) -> list[tuple[np.ndarray, np.ndarray]]:
+    '''
+    Возвращает разбиения на обучающие и проверочные части
+            Параметры:
+                    count(int): количество месяцев (данные упорядочены по времени)
+                    folds(int): количество разбиений
+                    mode(str): timeseries - проверка на отрезке после обучающего, kfold - случайные части
+            Возвращаемое значение:
+                    splits(list[tuple[np.ndarray, np.ndarray]]): индексы обучающей и проверочной частей
+    '''
+
+    from sklearn.model_selection import KFold, TimeSeriesSplit
+
+    if mode == "timeseries":
+        splitter = TimeSeriesSplit(n_splits=folds)
+    elif mode == "kfold":
+        splitter = KFold(n_splits=folds, shuffle=True, random_state=TRAIN_SPLIT_RANDOM_STATE)
+    else:
+        raise ValueError(f"Неизвестный способ разбиения: {mode}")
+    return list(splitter.split(np.arange(count)))
+
+
+def get_model_architecture(model_id:str) -> dict:
+    '''
+    Возвращает архитектуру модели без весов
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    architecture(dict): model_config и compile_config или None, если это необученная нейросеть стандартной архитектуры
+    '''
+
+    if not has_model_files(model_id):
+        model_type = get_model_type(model_id)
+        if model_type == MODEL_TYPE_HARMONIC:
+            return {"model_config": {"class_name": HarmonicRegression.CLASS_NAME, "config": {"harmonics": HARMONIC_MODEL_HARMONICS}}}
+        if model_id == STANDARD_MODEL_ID or model_type == MODEL_TYPE_KERAS:
+            return None
+        raise FileNotFoundError("Не найден файл модели")
+
+    artifact = load_artifact(model_id)
+    if artifact is None:
+        raise FileNotFoundError("Не удалось загрузить файл модели")
+    return {"model_config": artifact["model_config"], "compile_config": artifact["compile_config"]}
+
+
+def run_cv_fold(fold:int, architecture:dict, X:np.ndarray, y:np.ndarray, train_index:np.ndarray, test_index:np.ndarray, epochs:int) -> dict:
+    '''
+    Обучает архитектуру с новыми весами на одной части и оценивает на другой. Выполняется в процессе пула обучения,
+    а для гармонической регрессии - в текущем процессе
+            Параметры:
+                    fold(int): номер разбиения
+                    architecture(dict): результат get_model_architecture
+                    X(np.ndarray): годы и месяцы
+                    y(np.ndarray): средние температуры
+                    train_index(np.ndarray): индексы обучающей части
+                    test_index(np.ndarray): индексы проверочной части
+                    epochs(int): количество эпох
+            Возвращаемое значение:
+                    result(dict): номер разбиения, размеры частей, MAE, MSE и время или ошибка
+    '''
+
+    from sklearn.preprocessing import MinMaxScaler
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    started_at = time.perf_counter()
+    result = {"fold": fold, "train_size": len(train_index), "test_size": len(test_index)}
+    try:
+        if architecture is not None and is_harmonic_artifact(architecture):
+            # Гармоническая регрессия решается сразу и без нормализации, эпохи ей не нужны
+            model = HarmonicRegression(architecture["model_config"]["config"]["harmonics"]).fit(X[train_index], y[train_index])
+            y_pred = model.predict(X[test_index])
+        else:
+            import keras
+
+            # Процесс пула обучает несколько разбиений подряд, графы прошлых моделей ему не нужны
+            keras.backend.clear_session()
+            keras.utils.set_random_seed(TRAIN_SPLIT_RANDOM_STATE + fold)
+            if architecture is None:
+                model = get_standard_model()
+            else:
+                model = keras.models.model_from_json(json.dumps(architecture["model_config"]))
+                model.compile_from_config(architecture["compile_config"])
+
+            # Нормализация подбирается только по обучающей части, чтобы проверочные данные не влияли на обучение
+            scaler_X = MinMaxScaler()
+            scaler_y = MinMaxScaler()
+            X_train = scaler_X.fit_transform(X[train_index])
+            y_train = scaler_y.fit_transform(y[train_index].reshape(-1, 1))
+            model.fit(X_train, y_train, epochs=epochs, verbose=0)
+            y_pred = scaler_y.inverse_transform(model.predict(scaler_X.transform(X[test_index]), verbose=0))
+
+        result["mae"] = float(mean_absolute_error(y[test_index], y_pred.reshape(-1)))
+        result["mse"] = float(mean_squared_error(y[test_index], y_pred.reshape(-1)))
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["seconds"] = time.perf_counter() - started_at
+    return result
+
+
+def cross_validate(model_id:str, train_data_filename:str, epochs:int, folds:int=CV_FOLDS_DEFAULT, mode:str=CV_MODE_DEFAULT,
+                   workers:int=None, threads:int=TRAINING_WORKER_THREADS, on_result=None) -> dict:
+    '''
+    Проводит перекрестную проверку архитектуры модели
+            Параметры:
+                    model_id(str): id модели
+                    train_data_filename(str): файл с данными
+                    epochs(int): количество эпох на каждом разбиении
+                    folds(int): количество разбиений
+                    mode(str): способ разбиения (CV_MODES)
+                    workers(int): количество процессов (None - по числу ядер)
+                    threads(int): количество потоков TensorFlow в каждом процессе
+                    on_result(function): вызывается для каждого завершенного разбиения
+            Возвращаемое значение:
+                    summary(dict): результаты разбиений (folds), среднее и стандартное отклонение MAE и MSE
+    '''
+
+    architecture = get_model_architecture(model_id)
+
+    aggregated_data = get_monthly_temperatures(train_data_filename)
+    X = np.column_stack((
+        aggregated_data.index.get_level_values('year').to_numpy(),
+        aggregated_data.index.get_level_values('month').to_numpy(),
+    ))
+    y = aggregated_data["mean"].to_numpy()
+    splits = get_cv_splits(len(y), folds, mode)
+
+    results = []
+    if architecture is not None and is_harmonic_artifact(architecture):
+        for fold, (train_index, test_index) in enumerate(splits):
+            result = run_cv_fold(fold, architecture, X, y, train_index, test_index, epochs)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    else:
+        with create_worker_pool(min(len(splits), get_workers_count(workers)), threads) as executor:
+            futures = [
+                executor.submit(run_cv_fold, fold, architecture, X, y, train_index, test_index, epochs)
+                for fold, (train_index, test_index) in enumerate(splits)
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+
+    results.sort(key=lambda result: result["fold"])
+    summary = {"folds": results, "mode": mode}
+    for metric in ("mae", "mse"):
+        values = np.array([result[metric] for result in results if metric in result])
+        summary[metric] = float(values.mean()) if len(values) else None
+        summary[metric + "_std"] = float(values.std(ddof=1)) if len(values) > 1 else None
+    return summary
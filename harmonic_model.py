@@ -0,0 +1,94 @@
+# Гармоническая регрессия: средняя температура месяца как годовой цикл (синусы и косинусы месяца)
+# плюс линейный тренд по годам. Решается методом наименьших квадратов NumPy без Keras
+import numpy as np
+
+from config import *
+
+
+class HarmonicRegression:
+    '''
+    Модель температуры: свободный член, линейный тренд по годам и harmonics гармоник годового цикла.
+    Сохраняется в файл модели так же, как модели Keras: настройки в model_config, коэффициенты в weights
+            Параметры:
+                    harmonics(int): количество гармоник
+                    coef(np.array): коэффициенты (None - модель не обучена)
+                    year_offset(float): год, от которого отсчитывается тренд
+    '''
+
+    CLASS_NAME = "HarmonicRegression"
+
+    def __init__(self, harmonics:int=HARMONIC_MODEL_HARMONICS, coef:np.array=None, year_offset:float=0.0):
+        self.harmonics = int(harmonics)
+        self.coef = None if coef is None else np.asarray(coef, dtype=np.float64)
+        self.year_offset = float(year_offset)
+
+    def get_features(self, X:np.array) -> np.array:
+        '''
+        Возвращает признаки для строк (год, месяц)
+                Параметры:
+                        X(np.array): массив строк (год, месяц)
+                Возвращаемое значение:
+                        features(np.array): 1, год, sin и cos каждой гармоники месяца
+        '''
+
+        X = np.asarray(X, dtype=np.float64)
+        phase = 2 * np.pi * (X[:, 1] - 1) / 12
+        columns = [np.ones(len(X)), X[:, 0] - self.year_offset]
+        for k in range(1, self.harmonics + 1):
+            columns += [np.sin(k * phase), np.cos(k * phase)]
+        return np.column_stack(columns)
+
+    def fit(self, X:np.array, y:np.array) -> 'HarmonicRegression':
+        '''
+        Подбирает коэффициенты методом наименьших квадратов
+                Параметры:
+                        X(np.array): массив строк (год, месяц)
+                        y(np.array): средние температуры
+                Возвращаемое значение:
+                        model(HarmonicRegression): эта же модель
+        '''
+
+        self.year_offset = float(np.mean(np.asarray(X)[:, 0]))
+        self.coef = np.linalg.lstsq(self.get_features(X), np.asarray(y, dtype=np.float64).reshape(-1), rcond=None)[0]
+        return self
+
+    def predict(self, X:np.array, verbose=0) -> np.array:
+        '''
+        Предсказывает температуры. Принимает verbose, чтобы вызываться так же, как model.predict у Keras
+                Параметры:
+                        X(np.array): массив строк (год, месяц)
+                Возвращаемое значение:
+                        temperatures(np.array): массив размера (len(X), 1)
+        '''
+
+        return (self.get_features(X) @ self.coef).reshape(-1, 1)
+
+    def to_artifact(self, meta:dict=None) -> dict:
+        '''
+        Собирает содержимое файла модели. Нормализация не нужна, поэтому scaler_X и scaler_Y пустые
+                Параметры:
+                        meta(dict): сведения о модели и обучении
+                Возвращаемое значение:
+                        artifact(dict): содержимое файла модели
+        '''
+
+        return {
+            "meta": dict(meta or {}),
+            "model_config": {"class_name": self.CLASS_NAME, "config": {"harmonics": self.harmonics, "year_offset": self.year_offset}},
+            "compile_config": None,
+            "weights": [self.coef],
+            "optimizer_variables": [],
+            "scaler_X": None,
+            "scaler_Y": None,
+        }
+
+    @classmethod
+    def from_artifact(cls, artifact:dict) -> 'HarmonicRegression':
+        config = artifact["model_config"]["config"]
+        return cls(config["harmonics"], artifact["weights"][0], config["year_offset"])
+
+
+def is_harmonic_artifact(artifact:dict) -> bool:
+    '''Проверяет, хранится ли в файле модели гармоническая регрессия'''
+
+    return artifact["model_config"].get("class_name") == HarmonicRegression.CLASS_NAME
@@ -1,125 +1,1107 @@
-from keras.models import Sequential, load_model
-from keras.layers import Dense
-from keras.optimizers import Adam
-
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-
+# Keras, scikit-learn, pandas и joblib импортируются внутри функций при первом обучении
+# или предсказании, чтобы окно приложения открывалось без загрузки этих библиотек
 import numpy as np
-import pandas as pd
-import joblib
+import hashlib
 import json
-import keras
+import math
+import time
+import threading
+import uuid
 import os
 
+from collections import OrderedDict
+
 from config import *
+from model_registry import *
+from harmonic_model import HarmonicRegression, is_harmonic_artifact
+
+# Кэш загруженных моделей: хэш содержимого -> {"artifact": содержимое файла модели, "size": размер,
+# а также собранные по нему "model" и "engine"}. Файл с заданным хэшем не меняется,
+# поэтому записи не устаревают и убираются только при вытеснении и удалении файла (remove_blob)
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
 
-def save_models_metadata(models: dict) -> None:
+_ml_stack_lock = threading.RLock()
+
+def restore_integrity(migrate:bool=True) -> dict:
     '''
-    Сохраняет метаданные моделей (имя и описание) в файл
+    Восстанавливает целостность директорий (на случай если удалена папка моделей) и переводит модели
+    старых форматов в хранилище. Вызывается при запуске: при чтении модели файлы не переводятся и не удаляются
+            Параметры:
+                    migrate(bool): переводить ли модели старых форматов
+            Возвращаемое значение:
+                    stats(dict): сколько моделей переведено и не удалось перевести, сколько лишних файлов удалено
     '''
 
-    metadata = {
-        k: {"name": v["name"], "description": v.get("description", DEFAULT_DESCRIPTION)} 
-        for k, v in models.items() if k != STANDARD_MODEL_ID
-    }
-    with open(MODELS_DESCRIPTION_FILENAME, "w") as f:
-        json.dump(metadata, f)
+    if not os.path.exists(MODEL_BLOBS_DIRECTORY_PATH):
+        os.makedirs(MODEL_BLOBS_DIRECTORY_PATH)
+    return migrate_legacy_models() if migrate else {"migrated": 0, "failed": 0, "removed_files": 0}
+
+
+def import_ml_stack() -> None:
+    '''
+    Импортирует Keras, scikit-learn, pandas и joblib. Вызывается перед их первым использованием
+    и в фоновом потоке после показа окна, чтобы первое обучение или предсказание не ждало загрузки.
+    Импорт идет под блокировкой, потому что Keras нельзя импортировать одновременно из двух потоков
+    '''
+
+    with _ml_stack_lock:
+        import keras
+        import sklearn.preprocessing
+        import sklearn.model_selection
+        import sklearn.metrics
+        import pandas
+        import joblib
+        import training_callbacks
+
+
+def log_startup_time(seconds:float) -> None:
+    '''
+    Записывает время от запуска до первой отрисовки окна в журнал, чтобы следить за ним между версиями
+            Параметры:
+                    seconds(float): время в секундах
+    '''
+
+    print(f"Время до первой отрисовки окна: {seconds:.3f} с")
+    try:
+        with open(STARTUP_TIMES_LOG_PATH, "a") as f:
+            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')};{seconds:.3f}\n")
+    except OSError as e:
+        print(f"Не удалось записать время запуска: {e}")
+
+
+def get_blob_path(blob_hash:str) -> str:
+    '''
+    Возвращает путь к файлу модели с заданным хэшем содержимого
+            Параметры:
+                    blob_hash(str): хэш содержимого
+            Возвращаемое значение:
+                    path(str): путь к файлу
+    '''
+
+    return os.path.join(MODEL_BLOBS_DIRECTORY_PATH, blob_hash + MODEL_ARTIFACT_EXTENSION)
+
+
+def get_legacy_model_paths(model_id:str) -> list[str]:
+    '''
+    Возвращает пути к файлам модели в старых форматах: отдельный файл модели по id
+    и модель Keras с двумя файлами нормализации (joblib)
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    paths(list[str]): пути к файлу модели по id, к модели Keras и к моделям нормализации для X и Y
+    '''
+
+    return [
+        os.path.join(MODELS_DIRECTORY_PATH, model_id + MODEL_ARTIFACT_EXTENSION),
+        os.path.join(MODELS_DIRECTORY_PATH, model_id + ".keras"),
+        os.path.join(MODELS_DIRECTORY_PATH, "scaler_X" + model_id + ".keras"),
+        os.path.join(MODELS_DIRECTORY_PATH, "scaler_Y" + model_id + ".keras"),
+    ]
+
+
+def has_model_files(model_id:str) -> bool:
+    '''
+    Проверяет, есть ли у модели из реестра файл (в хранилище или в старом формате, который не удалось перевести)
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    exists(bool): есть ли файл
+    '''
+
+    record = get_model_record(model_id)
+    if record is None:
+        return False
+    if record["blob_hash"] is not None:
+        return True
+    return any(os.path.exists(path) for path in get_legacy_model_paths(model_id)[:2])
+
+
+def get_model_files_key(model_id:str) -> tuple:
+    '''
+    Возвращает хэш содержимого модели. По нему проверяется, не устарели ли кэш и таблица прогнозов
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    key(tuple): хэш содержимого (None, если модели нет в хранилище)
+    '''
+
+    record = get_model_record(model_id)
+    return (None if record is None else record["blob_hash"],)
+
+
+def remove_blob(blob_hash:str) -> None:
+    '''
+    Удаляет файл модели, на который больше никто не ссылается
+            Параметры:
+                    blob_hash(str): хэш содержимого (может быть None)
+    '''
 
+    if blob_hash is None:
+        return
 
-def restore_integrity() -> None:
+    def remove_file():
+        path = get_blob_path(blob_hash)
+        if os.path.exists(path):
+            os.remove(path)
+
+    if remove_unused_blob(blob_hash, remove_file):
+        with _model_cache_lock:
+            _model_cache.pop(blob_hash, None)
+
+
+def store_artifact(model_id:str, artifact:dict) -> str:
     '''
-    Восстанавливает целостность директорий (на случай если удалена папка моделей). Больше пока ничего не проверяет
+    Сохраняет содержимое модели в хранилище по хэшу и привязывает к нему модель.
+    Если такое содержимое уже есть, файл не пишется повторно, а сведения об обучении модели
+    сохраняются в реестре отдельно от файла. Файлы старых форматов удаляются
+            Параметры:
+                    model_id(str): id модели
+                    artifact(dict): содержимое файла модели
+            Возвращаемое значение:
+                    blob_hash(str): хэш содержимого
+    '''
+
+    from model_artifact import get_artifact_hash, write_artifact
+
+    blob_hash = get_artifact_hash(artifact)
+    path = get_blob_path(blob_hash)
+
+    def ensure_file():
+        if not os.path.exists(path):
+            write_artifact(path, artifact)
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    remove_blob(link_model_blob(model_id, blob_hash, path, artifact["meta"], ensure_file))
+    update_model_record(model_id, model_type=MODEL_TYPE_HARMONIC if is_harmonic_artifact(artifact) else MODEL_TYPE_KERAS)
+
+    for legacy_path in get_legacy_model_paths(model_id):
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+    return blob_hash
+
+
+def save_model_artifact(model_id:str, model:'keras.src.models.model', scalers:dict, meta:dict=None) -> str:
+    '''
+    Сохраняет модель в хранилище
+            Параметры:
+                    model_id(str): id модели
+                    model(keras.src.models.model): модель (или HarmonicRegression)
+                    scalers(dict): модели нормализации, ключи - scaler_X и scaler_Y
+                    meta(dict): сведения о модели и обучении
+            Возвращаемое значение:
+                    blob_hash(str): хэш содержимого
+    '''
+
+    if isinstance(model, HarmonicRegression):
+        return store_artifact(model_id, model.to_artifact(meta))
+
+    from model_artifact import artifact_from_model
+
+    return store_artifact(model_id, artifact_from_model(model, scalers, meta))
+
+
+def migrate_legacy_model(model_id:str) -> bool:
+    '''
+    Переводит модель старого формата (файл модели по id или .keras с двумя pickle нормализации) в хранилище
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    migrated(bool): удалось ли перевести модель
+    '''
+
+    artifact_path, model_path, scaler_X_path, scaler_Y_path = get_legacy_model_paths(model_id)
+
+    try:
+        if os.path.exists(artifact_path):
+            from model_artifact import read_artifact
+
+            store_artifact(model_id, read_artifact(artifact_path))
+            return True
+
+        if not os.path.exists(model_path):
+            return False
+
+        import_ml_stack()
+        from keras.models import load_model
+        import joblib
+
+        model = load_model(model_path)
+        scalers = {
+            "scaler_X": joblib.load(scaler_X_path) if os.path.exists(scaler_X_path) else None,
+            "scaler_Y": joblib.load(scaler_Y_path) if os.path.exists(scaler_Y_path) else None,
+        }
+        save_model_artifact(model_id, model, scalers, {"migrated_at": time.strftime("%Y-%m-%d %H:%M:%S")})
+    except Exception as e:
+        print(f"Не удалось перевести модель {model_id} в новый формат: {e}")
+        return False
+
+    return True
+
+
+def get_legacy_model_ids() -> list[str]:
+    '''
+    Возвращает id моделей, у которых остались файлы старых форматов
+            Возвращаемое значение:
+                    model_ids(list[str]): id моделей по порядку
     '''
 
     if not os.path.exists(MODELS_DIRECTORY_PATH):
-        os.makedirs(MODELS_DIRECTORY_PATH)
+        return []
 
+    model_ids = set()
+    for entry in os.scandir(MODELS_DIRECTORY_PATH):
+        name, extension = os.path.splitext(entry.name)
+        if (entry.is_file() and extension in (MODEL_ARTIFACT_EXTENSION, ".keras")
+                and not name.startswith(("scaler_", "checkpoint_")) and is_valid_model_id(name)):
+            model_ids.add(name)
+    return sorted(model_ids)
 
-def get_models() -> dict[str:dict]:
+
+def migrate_legacy_models() -> dict:
     '''
-    Возвращает модели по файлу описания моделей
+    Переводит в хранилище модели реестра, у которых остались файлы старых форматов.
+    Файлы моделей, которых нет в реестре, не трогает
             Возвращаемое значение:
-                    models (dict[str:dict]): словарь моделей, ключ - ID, значение - словарь со свойствами
+                    stats(dict): сколько моделей переведено и не удалось перевести, сколько лишних файлов удалено
     '''
-    models = {
-        STANDARD_MODEL_ID: {
-            "name": STANDARD_MODEL_NAME,
-            "description": STANDARD_MODEL_DESCRIPTION,
-            "var_name": None
-        },
-    }
 
-    descriptions = {}
+    stats = {"migrated": 0, "failed": 0, "removed_files": 0}
+    for model_id in get_legacy_model_ids():
+        record = get_model_record(model_id)
+        if record is None:
+            continue
+
+        # Если модель уже в хранилище, старые файлы остались от прерванного сохранения
+        if record["blob_hash"] is not None:
+            for path in get_legacy_model_paths(model_id):
+                if os.path.exists(path):
+                    os.remove(path)
+                    stats["removed_files"] += 1
+        elif migrate_legacy_model(model_id):
+            stats["migrated"] += 1
+        else:
+            stats["failed"] += 1
+    return stats
+
+
+def load_artifact(model_id:str) -> dict:
+    '''
+    Возвращает содержимое файла модели из реестра.
+    Файлы хранятся в LRU-кэше по хэшу содержимого, поэтому модели с одинаковым содержимым загружаются один раз.
+    Модели старого формата сюда не попадают: они переводятся в хранилище при запуске (restore_integrity)
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    artifact(dict): содержимое файла модели или None, если модели нет в реестре или она не загрузилась
+    '''
+
+    from model_artifact import read_artifact
+
+    # Путь к файлу строится только для моделей из реестра, id из запроса в него не попадает
+    record = get_model_record(model_id)
+    if record is None:
+        print(f"Модели {model_id} нет в реестре")
+        return None
+    blob_hash = record["blob_hash"]
+    if blob_hash is None:
+        print(f"Файлы модели {model_id} отсутствуют или пусты")
+        return None
+
+    with _model_cache_lock:
+        cached = _model_cache.get(blob_hash)
+        if cached is not None:
+            _model_cache.move_to_end(blob_hash)
+            return with_model_meta(model_id, cached["artifact"])
 
     try:
-        with open(MODELS_DESCRIPTION_FILENAME) as f:
-            descriptions = json.load(f)
+        artifact = read_artifact(get_blob_path(blob_hash))
+    except Exception as e:
+        print(f"Ошибка загрузки модели {model_id}: {e}")
+        return None
+    artifact["hash"] = blob_hash
 
-        for model_id, description in descriptions.items():
-            description["var_name"] = None
-            models[model_id] = description
+    with _model_cache_lock:
+        _model_cache[blob_hash] = {"artifact": artifact, "size": artifact["size"]}
+        _model_cache.move_to_end(blob_hash)
 
-    except FileNotFoundError:
-        # Ничего не делаем, если файла нет
-        pass
+        # Вытесняем давно использованные модели, последнюю загруженную оставляем всегда
+        while len(_model_cache) > 1 and (
+            len(_model_cache) > MODEL_CACHE_SIZE
+            or sum(cached["size"] for cached in _model_cache.values()) > MODEL_CACHE_MEMORY_LIMIT
+        ):
+            _model_cache.popitem(last=False)
+
+    return with_model_meta(model_id, artifact)
+
+
+def with_model_meta(model_id:str, artifact:dict) -> dict:
+    '''
+    Подставляет в содержимое файла сведения об обучении именно этой модели. Файл общий для моделей
+    с одинаковыми весами, поэтому его собственные сведения могут принадлежать другой модели
+            Параметры:
+                    model_id(str): id модели
+                    artifact(dict): содержимое файла модели из кэша (не меняется)
+            Возвращаемое значение:
+                    artifact(dict): содержимое файла со сведениями модели
+    '''
+
+    meta = get_model_meta(model_id)
+    return artifact if meta is None else {**artifact, "meta": meta}
+
+
+def get_cached_object(artifact:dict, name:str, build) -> object:
+    '''
+    Возвращает объект, построенный по файлу модели, и хранит его в кэше рядом с файлом
+            Параметры:
+                    artifact(dict): содержимое файла модели
+                    name(str): имя объекта в кэше
+                    build(function): функция, которая строит объект по содержимому файла
+            Возвращаемое значение:
+                    obj(object): объект
+    '''
+
+    # Содержимое файла определяется хэшем, поэтому объект подходит всем моделям с этим файлом
+    with _model_cache_lock:
+        cached = _model_cache.get(artifact["hash"])
+        if cached is not None and name in cached:
+            return cached[name]
 
-    return models
+    obj = build(artifact)
 
+    with _model_cache_lock:
+        cached = _model_cache.get(artifact["hash"])
+        if obj is not None and cached is not None:
+            cached[name] = obj
 
-def get_model(id: str) -> tuple['keras.src.models.model', MinMaxScaler, MinMaxScaler]:
+    return obj
+
+
+def get_model(id: str) -> tuple['keras.src.models.model', 'ScalerParams', 'ScalerParams']:
     '''
-    Возвращает кортеж: (модель, Scaler для X, Scaler для Y)
+    Возвращает кортеж: (модель, Scaler для X, Scaler для Y).
+    Модель Keras собирается по файлу модели один раз и хранится в кэше вместе с ним
             Параметры:
                     id (str): id модели
             Возвращаемое значение:
-                    model(tuple[keras.src.models.model, MinMaxScaler, MinMaxScaler]): необходимые модели
+                    model(tuple[keras.src.models.model, ScalerParams, ScalerParams]): необходимые модели
     '''
-    model = None
-    scaler_X = None
-    scaler_Y = None
 
-    model_path = os.path.join(MODELS_DIRECTORY_PATH, id + ".keras")
-    scaler_X_path = os.path.join(MODELS_DIRECTORY_PATH, "scaler_X" + id + ".keras")
-    scaler_Y_path = os.path.join(MODELS_DIRECTORY_PATH, "scaler_Y" + id + ".keras")
+    artifact = load_artifact(id)
+    if artifact is None:
+        return None, None, None
+
+    # Гармоническая регрессия собирается без Keras
+    if is_harmonic_artifact(artifact):
+        return get_cached_object(artifact, "model", HarmonicRegression.from_artifact), None, None
 
     try:
-        if os.path.exists(model_path):
-            model = load_model(model_path)
-        else:
-            print(f"Файлы модели {id} отсутствуют или пусты")
-            return None, None, None
-        
-        if os.path.exists(scaler_X_path):
-            scaler_X = joblib.load(scaler_X_path)
-        if os.path.exists(scaler_Y_path):
-            scaler_Y = joblib.load(scaler_Y_path)
+        import_ml_stack()
+        from model_artifact import build_keras_model
 
+        model = get_cached_object(artifact, "model", build_keras_model)
     except Exception as e:
         print(f"Ошибка загрузки модели {id}: {e}")
         return None, None, None
 
-    return model, scaler_X, scaler_Y
+    return model, artifact["scaler_X"], artifact["scaler_Y"]
+
+
+class InferenceEngine:
+    '''
+    Предсказывает температуру по году и месяцу.
+    Для моделей из полносвязных слоев веса извлекаются один раз, а прямой проход и обратная
+    нормализация считаются матричными умножениями NumPy. Для остальных моделей используется model.predict
+            Параметры:
+                    model(keras.src.models.model): модель (может быть None, если переданы слои)
+                    scaler_X(ScalerParams): модель нормализации годов и месяцев (может быть None)
+                    scaler_Y(ScalerParams): модель нормализации температур (может быть None)
+                    layers(list[tuple[np.array, np.array, function]]): готовые полносвязные слои
+    '''
+
+    ACTIVATIONS = {
+        "linear": lambda x: x,
+        "relu": lambda x: np.maximum(x, 0),
+        "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+        "tanh": np.tanh,
+        "elu": lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0))),
+    }
+
+    # Слои, которые при предсказании ничего не делают
+    PASSTHROUGH_LAYERS = ("InputLayer", "Dropout")
+
+    def __init__(self, model, scaler_X=None, scaler_Y=None, layers=None):
+        self.model = model
+        self.scaler_X = scaler_X
+        self.scaler_Y = scaler_Y
+        self.layers = layers if layers is not None else self.extract_dense_layers(model)
+
+    @classmethod
+    def layers_from_artifact(cls, artifact:dict) -> list:
+        '''
+        Извлекает полносвязные слои из файла модели без Keras
+                Параметры:
+                        artifact(dict): содержимое файла модели
+                Возвращаемое значение:
+                        layers(list[tuple[np.array, np.array, function]]): слои или None, если есть неподдерживаемые
+        '''
+
+        model_config = artifact["model_config"]
+        if model_config.get("class_name") != "Sequential":
+            return None
+
+        weights = list(artifact["weights"])
+        layers = []
+        for layer in model_config["config"]["layers"]:
+            if layer["class_name"] in cls.PASSTHROUGH_LAYERS:
+                continue
+            if layer["class_name"] != "Dense" or layer["config"].get("activation") not in cls.ACTIVATIONS:
+                return None
+
+            kernel = np.asarray(weights.pop(0), dtype=np.float32)
+            if layer["config"].get("use_bias", True):
+                bias = np.asarray(weights.pop(0), dtype=np.float32)
+            else:
+                bias = np.zeros(kernel.shape[1], dtype=np.float32)
+            layers.append((kernel, bias, cls.ACTIVATIONS[layer["config"]["activation"]]))
+
+        if weights:
+            return None
+        return layers or None
+
+    @classmethod
+    def extract_dense_layers(cls, model) -> list:
+        '''
+        Извлекает веса и функции активации полносвязных слоев
+                Параметры:
+                        model(keras.src.models.model): модель
+                Возвращаемое значение:
+                        layers(list[tuple[np.array, np.array, function]]): слои или None, если есть неподдерживаемые
+        '''
+
+        # Модели не из Keras (гармоническая регрессия) считаются своим методом predict
+        if not hasattr(model, "layers"):
+            return None
+
+        layers = []
+        for layer in model.layers:
+            layer_type = type(layer).__name__
+            if layer_type in cls.PASSTHROUGH_LAYERS:
+                continue
+            if layer_type != "Dense":
+                return None
+
+            activation = layer.get_config().get("activation")
+            if activation not in cls.ACTIVATIONS:
+                return None
+
+            weights = layer.get_weights()
+            kernel = np.asarray(weights[0], dtype=np.float32)
+            bias = np.asarray(weights[1], dtype=np.float32) if len(weights) > 1 else np.zeros(kernel.shape[1], dtype=np.float32)
+            layers.append((kernel, bias, cls.ACTIVATIONS[activation]))
+
+        return layers or None
+
+    @property
+    def is_native(self) -> bool:
+        '''Считается ли модель на NumPy без Keras'''
+
+        return self.layers is not None
+
+    def predict(self, inputs:np.array) -> np.array:
+        '''
+        Предсказывает температуры
+                Параметры:
+                        inputs(np.array): массив строк (год, месяц)
+                Возвращаемое значение:
+                        temperatures(np.array): температуры, по одной на каждую строку inputs
+        '''
 
+        inputs = np.asarray(inputs, dtype=np.float64)
+        scaled = inputs if self.scaler_X is None else inputs * self.scaler_X.scale_ + self.scaler_X.min_
+        if self.scaler_X is not None and getattr(self.scaler_X, "clip", False):
+            scaled = np.clip(scaled, *self.scaler_X.feature_range)
+        scaled = scaled.astype(np.float32)
 
-def get_standard_model() -> keras.src.models.model:
+        if self.layers is None:
+            outputs = self.model.predict(scaled, verbose=0)
+        else:
+            outputs = scaled
+            for kernel, bias, activation in self.layers:
+                outputs = activation(outputs @ kernel + bias)
+
+        outputs = np.asarray(outputs, dtype=np.float64).reshape(len(inputs), -1)
+        if self.scaler_Y is not None:
+            outputs = (outputs - self.scaler_Y.min_) / self.scaler_Y.scale_
+        return outputs[:, 0]
 
+
+def get_inference_engine(model_id:str) -> InferenceEngine:
     '''
-    Возвращает стандартную заготовленную модель
+    Возвращает движок предсказаний для модели. Движок хранится в кэше вместе с файлом модели.
+    Для моделей из полносвязных слоев он строится прямо по весам из файла без загрузки Keras
+            Параметры:
+                    model_id(str): id модели
             Возвращаемое значение:
-                    model(keras.src.models.model): модель
+                    engine(InferenceEngine): движок предсказаний или None, если модель не загрузилась
+    '''
+
+    artifact = load_artifact(model_id)
+    if artifact is None:
+        return None
+
+    def build_engine(artifact):
+        if is_harmonic_artifact(artifact):
+            return InferenceEngine(HarmonicRegression.from_artifact(artifact))
+
+        layers = InferenceEngine.layers_from_artifact(artifact)
+        if layers is not None:
+            return InferenceEngine(None, artifact["scaler_X"], artifact["scaler_Y"], layers)
+
+        model, scaler_X, scaler_Y = get_model(model_id)
+        return None if model is None else InferenceEngine(model, scaler_X, scaler_Y)
+
+    return get_cached_object(artifact, "engine", build_engine)
+
+
+def predict_months(engine:InferenceEngine, years:list[int]) -> np.ndarray:
+    '''
+    Предсказывает температуру всех месяцев для нескольких лет за один проход модели
+            Параметры:
+                    engine(InferenceEngine): движок предсказаний
+                    years(list[int]): годы
+            Возвращаемое значение:
+                    temperatures(np.ndarray): массив размера (len(years), 12), строка - год, столбец - месяц
+    '''
+
+    years = np.asarray(years).reshape(-1)
+    months = np.arange(1, 13)
+    inputs = np.column_stack((np.repeat(years, 12), np.tile(months, len(years))))
+    return engine.predict(inputs).reshape(len(years), 12)
+
+
+def predict_temperatures(model_ids:list[str], years:list[int]) -> 'pd.DataFrame':
+    '''
+    Предсказывает температуру всех месяцев заданных лет для нескольких моделей.
+    Для каждой модели строится один входной массив и выполняется один проход
+            Параметры:
+                    model_ids(list[str]): id моделей
+                    years(list[int]): годы, например range(INPUT_YEAR_VALUE_FROM, INPUT_YEAR_VALUE_TO + 1)
+            Возвращаемое значение:
+                    predictions(pd.DataFrame): таблица со столбцами model_id, year, month, temperature.
+                    Модели, которые не удалось загрузить, пропускаются
+    '''
+
+    import_ml_stack()
+    import pandas as pd
+
+    years = list(years)
+    in_table = all(INPUT_YEAR_VALUE_FROM <= year <= INPUT_YEAR_VALUE_TO for year in years)
+    frames = []
+    for model_id in model_ids:
+        # Допустимые годы берутся из таблицы прогнозов, остальные считаются моделью
+        if in_table:
+            table = get_forecast_table(model_id)
+            temperatures = None if table is None else table[np.array(years, dtype=int) - INPUT_YEAR_VALUE_FROM]
+        else:
+            engine = get_inference_engine(model_id)
+            temperatures = None if engine is None else predict_months(engine, years)
+
+        if temperatures is None:
+            print(f"Модель {model_id} не загрузилась, пропускаем ее")
+            continue
+        frames.append(pd.DataFrame({
+            "model_id": model_id,
+            "year": np.repeat(years, 12),
+            "month": np.tile(np.arange(1, 13), len(years)),
+            "temperature": temperatures.reshape(-1)
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=["model_id", "year", "month", "temperature"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def get_forecast_table_path(model_id:str) -> str:
+    '''
+    Возвращает путь к таблице прогнозов модели
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    path(str): путь к файлу таблицы рядом с файлом модели
+    '''
+
+    return os.path.join(MODELS_DIRECTORY_PATH, "forecast_" + model_id + ".json")
+
+
+def build_forecast_table(model_id:str, engine:InferenceEngine=None) -> np.ndarray:
+    '''
+    Считает прогнозы на все допустимые годы одним проходом модели и сохраняет их рядом с моделью
+            Параметры:
+                    model_id(str): id модели
+                    engine(InferenceEngine): движок предсказаний (None - загрузить модель с диска)
+            Возвращаемое значение:
+                    table(np.ndarray): массив размера (количество лет, 12) или None, если модель не загрузилась
+    '''
+
+    if engine is None:
+        engine = get_inference_engine(model_id)
+        if engine is None:
+            return None
+
+    years = list(range(INPUT_YEAR_VALUE_FROM, INPUT_YEAR_VALUE_TO + 1))
+    table = predict_months(engine, years)
+
+    path = get_forecast_table_path(model_id)
+    try:
+        with open(path + ".tmp", "w") as f:
+            json.dump({"key": get_model_files_key(model_id), "years": years, "temperatures": table.tolist()}, f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Не удалось сохранить таблицу прогнозов модели {model_id}: {e}")
+
+    return table
+
+
+def get_forecast_table(model_id:str) -> np.ndarray:
+    '''
+    Возвращает таблицу прогнозов модели на годы INPUT_YEAR_VALUE_FROM..INPUT_YEAR_VALUE_TO.
+    Таблица пересчитывается, только если изменились файлы модели
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    table(np.ndarray): массив размера (количество лет, 12) или None, если модель не загрузилась
+    '''
+
+    if get_model_record(model_id) is None:
+        return None
+
+    try:
+        with open(get_forecast_table_path(model_id)) as f:
+            saved = json.load(f)
+        if (tuple(saved["key"]) == get_model_files_key(model_id)
+                and saved["years"] == list(range(INPUT_YEAR_VALUE_FROM, INPUT_YEAR_VALUE_TO + 1))):
+            return np.array(saved["temperatures"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    return build_forecast_table(model_id)
+
+
+def get_forecast(model_id:str, year:int) -> np.ndarray:
+    '''
+    Возвращает прогноз по месяцам года. Для допустимых лет берется из таблицы прогнозов
+            Параметры:
+                    model_id(str): id модели
+                    year(int): год
+            Возвращаемое значение:
+                    temperatures(np.ndarray): температуры по месяцам или None, если модель не загрузилась
+    '''
+
+    if INPUT_YEAR_VALUE_FROM <= year <= INPUT_YEAR_VALUE_TO:
+        table = get_forecast_table(model_id)
+        return None if table is None else table[year - INPUT_YEAR_VALUE_FROM]
+
+    engine = get_inference_engine(model_id)
+    return None if engine is None else predict_months(engine, [year])[0]
+
+
+def predict_weather_summary(month:int, year:int=WEATHER_SUMMARY_YEAR) -> float:
+    '''
+    Предсказывает среднюю температуру месяца по стандартной модели для боковой панели и сохраняет ее на диск
+            Параметры:
+                    month(int): номер месяца
+                    year(int): год
+            Возвращаемое значение:
+                    temperature(float): температура или None, если стандартная модель не готова
+    '''
+
+    temperatures = get_forecast(STANDARD_MODEL_ID, year)
+    if temperatures is None:
+        return None
+
+    temperature = float(temperatures[month - 1])
+    save_weather_summary(year, month, temperature)
+    return temperature
+
+
+def save_weather_summary(year:int, month:int, temperature:float) -> None:
+    '''
+    Сохраняет последний прогноз боковой панели, чтобы при следующем запуске показать его сразу
+            Параметры:
+                    year(int): год
+                    month(int): номер месяца
+                    temperature(float): температура
+    '''
+
+    tmp_path = WEATHER_SUMMARY_CACHE_PATH + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"year": year, "month": month, "temperature": temperature}, f)
+        os.replace(tmp_path, WEATHER_SUMMARY_CACHE_PATH)
+    except OSError as e:
+        print(f"Не удалось сохранить прогноз боковой панели: {e}")
+
+
+def load_weather_summary(month:int, year:int=WEATHER_SUMMARY_YEAR) -> float:
+    '''
+    Возвращает прогноз боковой панели, сохраненный при прошлом запуске
+            Параметры:
+                    month(int): номер месяца
+                    year(int): год
+            Возвращаемое значение:
+                    temperature(float): температура или None, если сохраненного прогноза на этот месяц нет
+    '''
+
+    try:
+        with open(WEATHER_SUMMARY_CACHE_PATH) as f:
+            summary = json.load(f)
+        if summary["year"] == year and summary["month"] == month:
+            return float(summary["temperature"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def save_trained_model(model_id:str, model:'keras.src.models.model', scalers:dict, metrics:dict=None, train_data_filename:str=None) -> None:
+    '''
+    Сохраняет обученную модель вместе с моделями нормализации и оценкой в файл модели и считает таблицу прогнозов
+            Параметры:
+                    model_id(str): id модели
+                    model(keras.src.models.model): обученная модель
+                    scalers(dict): модели нормализации, ключи - scaler_X и scaler_Y
+                    metrics(dict): оценка модели (mae, mse) и проверочные месяцы test_months, как их возвращает train_model
+                    train_data_filename(str): файл, на котором обучалась модель. Его месяцы запоминаются для дообучения
+    '''
+
+    metrics = dict(metrics or {})
+    test_months = metrics.pop("test_months", None)
+    meta = {"trained_at": time.strftime("%Y-%m-%d %H:%M:%S"), "metrics": metrics}
+    if train_data_filename is not None:
+        meta["trained_months"] = get_trained_months(get_monthly_temperatures(train_data_filename))
+    # Проверочные месяцы запоминаются, чтобы при дообучении они так и остались проверочными
+    if test_months is not None:
+        meta["test_months"] = test_months
+    save_model_artifact(model_id, model, scalers, meta)
+    update_model_record(model_id, mae=metrics.get("mae"), mse=metrics.get("mse"), trained_at=meta["trained_at"])
+
+    # Прогнозы на все допустимые годы считаются сразу, пока модель в памяти
+    build_forecast_table(model_id, InferenceEngine(model, scalers["scaler_X"], scalers["scaler_Y"]))
+
+
+def export_model(model_id:str, path:str) -> None:
+    '''
+    Сохраняет модель в выбранный файл. В формате файла модели сохраняется все вместе с нормализацией,
+    в формате .keras - только нейросеть для других программ на Keras
+            Параметры:
+                    model_id(str): id модели
+                    path(str): путь к файлу (.wpm или .keras)
+    '''
+
+    if path.endswith(".keras"):
+        model, scaler_X, scaler_Y = get_model(model_id)
+        if model is None:
+            raise FileNotFoundError("Не найден файл модели")
+        if isinstance(model, HarmonicRegression):
+            raise ValueError("Гармоническую модель можно сохранить только в файл модели")
+        model.save(path)
+        return
+
+    from model_artifact import write_artifact
+
+    artifact = load_artifact(model_id)
+    if artifact is None:
+        raise FileNotFoundError("Не найден файл модели")
+    write_artifact(path, artifact)
+
+
+def import_model(filename:str) -> str:
+    '''
+    Добавляет модель из файла модели или из файла Keras (.keras, без нормализации).
+    Модель попадает в реестр с именем по умолчанию, модель с уже известным содержимым не занимает места на диске.
+    Если файл не прочитался, запись в реестре удаляется
+            Параметры:
+                    filename(str): путь к файлу
+            Возвращаемое значение:
+                    model_id(str): id новой модели
+    '''
+
+    from model_artifact import read_artifact
+
+    model_id = str(uuid.uuid4())
+    add_model_record(model_id, DEFAULT_MODEL_NAME, DEFAULT_DESCRIPTION)
+    try:
+        if filename.endswith(MODEL_ARTIFACT_EXTENSION):
+            artifact = read_artifact(filename)
+            artifact["meta"]["imported_from"] = os.path.basename(filename)
+            store_artifact(model_id, artifact)
+        else:
+            import_ml_stack()
+            from keras.models import load_model
+
+            model = load_model(filename)
+            save_model_artifact(model_id, model, {"scaler_X": None, "scaler_Y": None},
+                                {"imported_from": os.path.basename(filename)})
+    except Exception:
+        delete_model(model_id)
+        raise
+
+    return model_id
+
+
+def create_model(name:str, description:str=DEFAULT_DESCRIPTION, model_type:str=MODEL_TYPE_KERAS) -> str:
+    '''
+    Добавляет в реестр новую необученную модель. Нейросеть получает архитектуру стандартной модели
+            Параметры:
+                    name(str): имя
+                    description(str): описание
+                    model_type(str): тип модели (MODEL_TYPES)
+            Возвращаемое значение:
+                    model_id(str): id новой модели
+    '''
+
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f"Неизвестный тип модели: {model_type}")
+
+    model_id = str(uuid.uuid4())
+    add_model_record(model_id, name, description)
+    update_model_record(model_id, model_type=model_type)
+    return model_id
+
+
+def get_model_type(model_id:str) -> str:
+    '''
+    Возвращает тип модели из реестра
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    model_type(str): тип модели или None, если он неизвестен (модель старого реестра без файла)
+    '''
+
+    record = get_model_record(model_id)
+    return None if record is None else record["model_type"]
+
+
+def delete_model(model_id:str) -> None:
+    '''
+    Удаляет модель: запись в реестре, таблицу прогнозов, контрольную точку
+    и файл модели, если на него больше не ссылаются другие модели
+            Параметры:
+                    model_id(str): id модели
+    '''
+
+    if not is_valid_model_id(model_id):
+        raise ValueError(f"Недопустимый id модели: {model_id}")
+
+    remove_blob(delete_model_record(model_id))
+    for path in get_legacy_model_paths(model_id) + [get_forecast_table_path(model_id)]:
+        if os.path.exists(path):
+            os.remove(path)
+    delete_checkpoint(model_id)
+
+
+def compact_model_storage() -> dict:
+    '''
+    Переводит все модели старых форматов в хранилище по хэшу (одинаковые модели получают общий файл),
+    пересчитывает ссылки и удаляет файлы, на которые никто не ссылается
+            Возвращаемое значение:
+                    stats(dict): сколько моделей переведено и не удалось перевести, сколько файлов удалено,
+                    размер файлов моделей до и после в байтах
     '''
 
+    restore_integrity(migrate=False)
+
+    def get_storage_size():
+        return sum(
+            entry.stat().st_size
+            for directory in (MODELS_DIRECTORY_PATH, MODEL_BLOBS_DIRECTORY_PATH)
+            for entry in os.scandir(directory) if entry.is_file()
+            and entry.name.endswith((MODEL_ARTIFACT_EXTENSION, ".keras")) and not entry.name.startswith("checkpoint_")
+        )
+
+    size_before = get_storage_size()
+
+    # Файлы старых форматов без записи в реестре добавляются в реестр как модели без имени
+    for model_id in get_legacy_model_ids():
+        if get_model_record(model_id) is None:
+            add_model_record(model_id, DEFAULT_MODEL_NAME, DEFAULT_DESCRIPTION)
+
+    stats = migrate_legacy_models()
+    stats["size_before"] = size_before
+
+    for blob_hash in recount_blobs():
+        remove_blob(blob_hash)
+        stats["removed_files"] += 1
+
+    # Файлы хранилища, о которых не знает реестр, и недописанные файлы
+    blobs = get_blobs()
+    for entry in os.scandir(MODEL_BLOBS_DIRECTORY_PATH):
+        blob_hash, extension = os.path.splitext(entry.name)
+        if entry.is_file() and (extension != MODEL_ARTIFACT_EXTENSION or blob_hash not in blobs):
+            os.remove(entry.path)
+            stats["removed_files"] += 1
+
+    stats["size_after"] = get_storage_size()
+    return stats
+
+
+def get_checkpoint_path(model_id:str) -> str:
+    '''
+    Возвращает путь к файлу контрольной точки обучения модели
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    path(str): путь к файлу точки (в формате файла модели)
+    '''
+
+    return os.path.join(MODELS_DIRECTORY_PATH, "checkpoint_" + model_id + MODEL_ARTIFACT_EXTENSION)
+
+
+def get_checkpoint(model_id:str) -> dict:
+    '''
+    Возвращает сведения о последней контрольной точке обучения модели
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    checkpoint(dict): эпоха, количество эпох, файл данных и потери или None, если точки нет
+    '''
+
+    from model_artifact import read_artifact
+
+    path = get_checkpoint_path(model_id)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        return read_artifact(path)["meta"]["checkpoint"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ошибка чтения контрольной точки модели {model_id}: {e}")
+        return None
+
+
+def delete_checkpoint(model_id:str) -> None:
+    '''
+    Удаляет контрольную точку обучения модели (и точку старого формата из четырех файлов)
+            Параметры:
+                    model_id(str): id модели
+    '''
+
+    for path in [
+        get_checkpoint_path(model_id),
+        os.path.join(MODELS_DIRECTORY_PATH, "checkpoint_" + model_id + ".keras"),
+        os.path.join(MODELS_DIRECTORY_PATH, "checkpoint_scaler_X" + model_id + ".keras"),
+        os.path.join(MODELS_DIRECTORY_PATH, "checkpoint_scaler_Y" + model_id + ".keras"),
+        os.path.join(MODELS_DIRECTORY_PATH, "checkpoint_" + model_id + ".json"),
+    ]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def get_stop_callbacks(time_budget:float=None, patience:int=None, min_delta:float=0.0) -> list:
+    '''
+    Возвращает обратные вызовы для досрочной остановки обучения
+            Параметры:
+                    time_budget(float): максимальное время обучения в секундах (None - без ограничения)
+                    patience(int): сколько эпох ждать улучшения потерь (None - без ранней остановки)
+                    min_delta(float): минимальное уменьшение потерь, которое считается улучшением
+            Возвращаемое значение:
+                    callbacks(list): обратные вызовы для train_model
+    '''
+
+    import_ml_stack()
+    from training_callbacks import TimeBudgetStopping, ConvergenceStopping
+
+    callbacks = []
+    if time_budget:
+        callbacks.append(TimeBudgetStopping(time_budget))
+    if patience:
+        callbacks.append(ConvergenceStopping(patience, min_delta))
+    return callbacks
+
+
+def get_stop_reason(callbacks:list) -> str:
+    '''
+    Возвращает причину остановки обучения по обратным вызовам, которые в нем участвовали
+            Параметры:
+                    callbacks(list): обратные вызовы, переданные в train_model
+            Возвращаемое значение:
+                    stop_reason(str): причина остановки
+    '''
+
+    for callback in callbacks:
+        if getattr(callback, "stop_reason", None):
+            return callback.stop_reason
+    return STOP_REASON_EPOCHS
+
+
+def split_validation(train_index:np.ndarray, callbacks:list) -> tuple[np.ndarray, np.ndarray]:
+    '''
+    Отделяет от обучающей части месяцы для ранней остановки, если она есть среди обратных вызовов.
+    Лучшая эпоха выбирается по ним, а не по проверочной части, иначе MAE и MSE на проверочной части были бы занижены
+            Параметры:
+                    train_index(np.ndarray): индексы обучающей части
+                    callbacks(list): обратные вызовы обучения
+            Возвращаемое значение:
+                    split(tuple[np.ndarray, np.ndarray]): индексы, на которых идет обучение, и индексы для ранней остановки
+                                                          (None, если ранней остановки нет)
+    '''
+
+    from sklearn.model_selection import train_test_split
+
+    if len(train_index) < 2 or not any(getattr(callback, "monitor", None) == "val_loss" for callback in callbacks):
+        return train_index, None
+    return tuple(train_test_split(train_index, test_size=TRAIN_VALIDATION_SIZE, random_state=TRAIN_SPLIT_RANDOM_STATE))
+
+
+def build_dense_model(units:tuple[int]=STANDARD_MODEL_UNITS, activation:str=STANDARD_MODEL_ACTIVATION,
+                      learning_rate:float=STANDARD_MODEL_LEARNING_RATE) -> 'keras.src.models.model':
+    '''
+    Возвращает полносвязную модель: вход (год, месяц), скрытые слои и один линейный выход
+            Параметры:
+                    units(tuple[int]): количество нейронов в каждом скрытом слое
+                    activation(str): функция активации скрытых слоев
+                    learning_rate(float): скорость обучения Adam
+            Возвращаемое значение:
+                    model(keras.src.models.model): скомпилированная модель
+    '''
+
+    import_ml_stack()
+    from keras.models import Sequential
+    from keras.layers import Dense, Input
+    from keras.optimizers import Adam
+
     model = Sequential()
-    model.add(Dense(64, input_dim=2, activation='relu'))
-    model.add(Dense(32, activation='relu'))
+    model.add(Input(shape=(2,)))
+    for layer_units in units:
+        model.add(Dense(layer_units, activation=activation))
     model.add(Dense(1, activation='linear'))
-    model.compile(optimizer=Adam(learning_rate=0.01), loss='mse')
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss='mse')
     return model
 
 
-def get_sсaled_data(years:list[int], months:list[int], temps:list[int], scaler_X:MinMaxScaler, scaler_y:MinMaxScaler) -> tuple[np.array, np.array]:
+def get_standard_model() -> 'keras.src.models.model':
+
+    '''
+    Возвращает стандартную заготовленную модель
+            Возвращаемое значение:
+                    model(keras.src.models.model): модель
+    '''
+
+    return build_dense_model()
+
+
+def get_harmonic_model() -> HarmonicRegression:
+    '''
+    Возвращает необученную гармоническую регрессию - быструю модель без Keras
+            Возвращаемое значение:
+                    model(HarmonicRegression): модель
+    '''
+
+    return HarmonicRegression(HARMONIC_MODEL_HARMONICS)
+
+
+def get_sсaled_data(years:list[int], months:list[int], temps:list[int], scaler_X:'MinMaxScaler', scaler_y:'MinMaxScaler') -> tuple[np.array, np.array]:
   
     '''
     Возвращает нормализованные данные
@@ -141,45 +1123,208 @@ def get_sсaled_data(years:list[int], months:list[int], temps:list[int], scaler_
     return X_scaled, y_scaled
 
 
-def train_model(model_id:str, train_data_filename:str, epochs:int, verbose=1, callbacks=None):
+def read_monthly_temperatures(train_data_filename:str, chunksize:int=TRAIN_DATA_CHUNK_SIZE) -> 'pd.DataFrame':
+    '''
+    Потоково читает файл с наблюдениями и считает среднюю температуру по месяцам.
+    Файл читается частями по chunksize строк и только с колонками времени и температуры,
+    поэтому потребление памяти не зависит от размера файла
+            Параметры:
+                    train_data_filename(str): имя файла с наблюдениями
+                    chunksize(int): количество строк, читаемых за один раз
+            Возвращаемое значение:
+                    aggregated_data(pd.DataFrame): средние температуры, индекс - (year, month), колонка - mean
+    '''
+
+    import_ml_stack()
+    import pandas as pd
+
+    sums = {}
+    counts = {}
+
+    chunks = pd.read_csv(
+        os.path.abspath(train_data_filename), encoding='utf-8', sep=";", index_col=False, header=0,
+        usecols=lambda column: column in ("timestamp", RP5_TIMESTAMP_COLUMN, "T"), chunksize=chunksize
+    )
+
+    for chunk in chunks:
+        if "timestamp" not in chunk.columns:
+            chunk = chunk.rename(columns={RP5_TIMESTAMP_COLUMN:'timestamp'})
+
+        timestamps = pd.to_datetime(chunk['timestamp'], dayfirst=True)
+        grouped = chunk['T'].groupby([timestamps.dt.year.rename('year'), timestamps.dt.month.rename('month')]).agg(['sum', 'count'])
+
+        # Суммы по частям копим отдельно и складываем в конце через math.fsum, чтобы не терять точность
+        for key, total, count in zip(grouped.index, grouped["sum"], grouped["count"]):
+            sums.setdefault(key, []).append(total)
+            counts[key] = counts.get(key, 0) + count
+
+    keys = sorted(sums)
+    means = [math.fsum(sums[key]) / counts[key] if counts[key] else np.nan for key in keys]
+
+    return pd.DataFrame(
+        {"mean": means},
+        index=pd.MultiIndex.from_tuples(keys, names=['year', 'month'])
+    )
+
+
+def get_file_fingerprint(filename:str) -> dict:
+    '''
+    Возвращает отпечаток файла: путь, размер, время изменения и хэш содержимого.
+    Для больших файлов хэш считается по первому, среднему и последнему блокам,
+    чтобы проверка кэша не требовала чтения всего файла
+            Параметры:
+                    filename(str): имя файла
+            Возвращаемое значение:
+                    fingerprint(dict): отпечаток файла
+    '''
+
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+
+    content_hash = hashlib.blake2b(str(stat.st_size).encode())
+    with open(path, "rb") as f:
+        for offset in sorted({0, max(0, stat.st_size // 2 - TRAIN_DATA_HASH_BLOCK_SIZE // 2), max(0, stat.st_size - TRAIN_DATA_HASH_BLOCK_SIZE)}):
+            f.seek(offset)
+            content_hash.update(f.read(TRAIN_DATA_HASH_BLOCK_SIZE))
+
+    return {
+        "path": path,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "content_hash": content_hash.hexdigest(),
+    }
+
+
+def evict_train_data_cache(max_size:int=TRAIN_DATA_CACHE_MAX_SIZE) -> None:
+    '''
+    Удаляет самые давно использованные файлы кэша, пока его размер больше max_size
+            Параметры:
+                    max_size(int): максимальный размер кэша в байтах
+    '''
+
+    if not os.path.exists(TRAIN_DATA_CACHE_DIRECTORY_PATH):
+        return
+
+    cache_files = [entry for entry in os.scandir(TRAIN_DATA_CACHE_DIRECTORY_PATH) if entry.is_file()]
+    cache_files.sort(key=lambda entry: entry.stat().st_mtime)
+    total_size = sum(entry.stat().st_size for entry in cache_files)
+
+    for entry in cache_files:
+        if total_size <= max_size:
+            break
+        total_size -= entry.stat().st_size
+        os.remove(entry.path)
+
+
+def get_monthly_temperatures(train_data_filename:str) -> 'pd.DataFrame':
+    '''
+    Возвращает средние температуры по месяцам, используя кэш на диске.
+    Если файл не менялся с прошлого разбора, данные берутся из кэша без чтения CSV,
+    иначе файл разбирается заново и кэш перезаписывается
+            Параметры:
+                    train_data_filename(str): имя файла с наблюдениями
+            Возвращаемое значение:
+                    aggregated_data(pd.DataFrame): средние температуры, индекс - (year, month), колонка - mean
+    '''
+
+    # Разбору нужен только pandas: модели без Keras (гармоническая регрессия) обучаются, не загружая его
+    import pandas as pd
+
+    fingerprint = get_file_fingerprint(train_data_filename)
+    cache_name = hashlib.sha1(fingerprint["path"].encode()).hexdigest() + ".npz"
+    cache_path = os.path.join(TRAIN_DATA_CACHE_DIRECTORY_PATH, cache_name)
+
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if json.loads(str(cached["fingerprint"])) == fingerprint:
+                aggregated_data = pd.DataFrame(
+                    {"mean": cached["mean"]},
+                    index=pd.MultiIndex.from_arrays([cached["year"], cached["month"]], names=['year', 'month'])
+                )
+                # Обновляем время изменения, чтобы при вытеснении файл считался недавно использованным
+                os.utime(cache_path)
+                return aggregated_data
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Не удалось прочитать кэш данных {cache_path}: {e}")
+
+    aggregated_data = read_monthly_temperatures(train_data_filename)
+
+    try:
+        os.makedirs(TRAIN_DATA_CACHE_DIRECTORY_PATH, exist_ok=True)
+        temp_path = cache_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(
+                f,
+                fingerprint=np.array(json.dumps(fingerprint)),
+                year=aggregated_data.index.get_level_values('year').to_numpy(),
+                month=aggregated_data.index.get_level_values('month').to_numpy(),
+                mean=aggregated_data["mean"].to_numpy(),
+            )
+        os.replace(temp_path, cache_path)
+        evict_train_data_cache()
+    except Exception as e:
+        print(f"Не удалось сохранить кэш данных {cache_path}: {e}")
+
+    return aggregated_data
+
+
+def train_model(model_id:str, train_data_filename:str, epochs:int, verbose=1, callbacks=None, resume=False,
+                checkpoint_every=TRAIN_CHECKPOINT_EVERY, incremental=False):
     '''
     Тренирует модель
             Параметры:
                     model_id(str): id модели
                     train_data_filename(str): имя файла, на котором происходит обучение
                     epochs(int): количество эпох
+                    resume(bool): продолжить обучение с последней контрольной точки
+                    checkpoint_every(int): через сколько эпох сохранять контрольную точку (0 - не сохранять)
+                    incremental(bool): дообучить только на новых и изменившихся месяцах, если это возможно
             Возвращаемое значение:
-                    train_data(tuple[dict, keras.src.models.model, dict, dict]): передает history обучения, обученную модель, результаты оценки (mae, mse), модели нормализации
+                    train_data(tuple[dict, keras.src.models.model, dict, dict]): передает history обучения, обученную модель,
+                    результаты оценки (mae, mse и проверочные месяцы test_months), модели нормализации
     '''
 
-    find_model = False
-    model = None
-
-    model_filename = model_id + ".keras"
+    model_type = get_model_type(model_id)
+    # Гармоническая регрессия решается заново за доли секунды, дообучать ее не нужно
+    if model_type == MODEL_TYPE_HARMONIC:
+        return train_harmonic_model(train_data_filename)
 
-    for model_file in os.scandir(MODELS_DIRECTORY_PATH):  
-        if model_file.is_file() and model_file.name == model_filename:
-            model = load_model(MODELS_DIRECTORY_PATH + "\\" + model_filename)
-            find_model = True
+    if incremental:
+        if resume:
+            raise ValueError("Дообучение нельзя продолжить с контрольной точки")
+        train_data = train_model_incremental(model_id, train_data_filename, epochs, verbose, callbacks)
+        if train_data is not None:
+            return train_data
 
-    if not find_model:
-        # Если не нашли стандартную модель в файлах, значит нужно ее создать
-        if model_id == STANDARD_MODEL_ID:
-            model = get_standard_model()
-        # Если не нашли нестандартную модель в файлах, значит ее кто-то удалил оттуда
-        else:
-            raise FileNotFoundError("Не найден файл модели")
+    import_ml_stack()
+    from sklearn.preprocessing import MinMaxScaler
+    from sklearn.model_selection import train_test_split
+    from training_callbacks import TrainingCheckpoint
+    from model_artifact import read_artifact, build_keras_model
 
-    historic_data = pd.read_csv(os.path.abspath(train_data_filename), encoding='utf-8', sep=";", index_col=False, header=0, low_memory=False)
-    if "timestamp" not in historic_data.columns:
-        historic_data = historic_data.rename(columns={'Местное время в Москве (ВДНХ)':'timestamp'})
+    checkpoint = get_checkpoint(model_id) if resume else None
+    if resume and checkpoint is None:
+        raise FileNotFoundError("Не найдена контрольная точка обучения модели")
 
-    historic_data = historic_data[["timestamp", "T"]]
-    historic_data['timestamp'] = pd.to_datetime(historic_data['timestamp'], dayfirst=True)
-    historic_data['year'] = historic_data.timestamp.dt.year
-    historic_data['month'] = historic_data.timestamp.dt.month
+    # Модель каждый раз собирается заново, чтобы обучение не меняло модель из кэша
+    if checkpoint is not None:
+        checkpoint_artifact = read_artifact(get_checkpoint_path(model_id))
+        model = build_keras_model(checkpoint_artifact)
+    elif has_model_files(model_id):
+        artifact = load_artifact(model_id)
+        if artifact is None:
+            raise FileNotFoundError("Не удалось загрузить файл модели")
+        model = build_keras_model(artifact)
+    # Если не нашли стандартную или только что созданную модель в файлах, значит нужно ее создать
+    elif model_id == STANDARD_MODEL_ID or model_type == MODEL_TYPE_KERAS:
+        model = get_standard_model()
+    # Если не нашли нестандартную модель в файлах, значит ее кто-то удалил оттуда
+    else:
+        raise FileNotFoundError("Не найден файл модели")
 
-    aggregated_data = historic_data.groupby(['year', 'month'])['T'].agg(['mean'])
+    aggregated_data = get_monthly_temperatures(train_data_filename)
 
     years = []
     months = []
@@ -189,22 +1334,217 @@ def train_model(model_id:str, train_data_filename:str, epochs:int, verbose=1, ca
 
     temperatures = np.array(aggregated_data["mean"])
 
-    scaler_X = MinMaxScaler()
-    scaler_y = MinMaxScaler()
+    if checkpoint is not None:
+        # Продолжаем с контрольной точки, нормализация берется из неё
+        scaler_X = checkpoint_artifact["scaler_X"]
+        scaler_y = checkpoint_artifact["scaler_Y"]
+        X_scaled = scaler_X.transform(np.column_stack((years, months)))
+        y_scaled = scaler_y.transform(temperatures.reshape(-1, 1))
+        initial_epoch = checkpoint["epoch"]
+    else:
+        scaler_X = MinMaxScaler()
+        scaler_y = MinMaxScaler()
 
-    X_scaled, y_scaled = get_sсaled_data(years, months, temperatures, scaler_X, scaler_y)
+        X_scaled, y_scaled = get_sсaled_data(years, months, temperatures, scaler_X, scaler_y)
+        initial_epoch = 0
 
-    # Оцениваем точность модели
-    evaluate_test = {"mae":0, "mse":0}
-    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_scaled)
-    model.fit(X_train, y_train, epochs=epochs, verbose=verbose, callbacks=callbacks)
-    predictions = model.predict(X_test)
-    y_pred = scaler_y.inverse_transform(predictions)
+    # Разбиение фиксировано, чтобы при продолжении обучения проверочные данные не менялись
+    train_index, test_index = train_test_split(
+        np.arange(len(X_scaled)), test_size=TRAIN_TEST_SIZE, random_state=TRAIN_SPLIT_RANDOM_STATE
+    )
+    X_test, y_test = X_scaled[test_index], y_scaled[test_index]
+
+    scalers = {"scaler_X": scaler_X, "scaler_Y": scaler_y}
+    fit_callbacks = list(callbacks or [])
+    if checkpoint_every:
+        checkpoint_info = checkpoint or {"filename": train_data_filename, "epochs": epochs, "epoch": 0, "loss": []}
+        fit_callbacks.append(TrainingCheckpoint(model_id, checkpoint_info, scalers, checkpoint_every))
+
+    # Проверочная часть в обучении не участвует, ранняя остановка смотрит на свою часть обучающих данных
+    fit_index, validation_index = split_validation(train_index, fit_callbacks)
+    validation_data = None if validation_index is None else (X_scaled[validation_index], y_scaled[validation_index])
+    history = model.fit(
+        X_scaled[fit_index], y_scaled[fit_index], validation_data=validation_data, epochs=epochs,
+        initial_epoch=initial_epoch, verbose=verbose, callbacks=fit_callbacks
+    )
+
+    # Оцениваем точность той же модели, которая будет сохранена
+    evaluate_test = evaluate_model(model, X_test, y_test, scaler_y, verbose)
+    evaluate_test["test_months"] = [[int(years[i]), int(months[i])] for i in test_index]
+
+    return history, model, evaluate_test, scalers
+
+
+def evaluate_model(model:'keras.src.models.model', X_test:np.array, y_test:np.array, scaler_y:'MinMaxScaler', verbose=0) -> dict:
+    '''
+    Оценивает модель на проверочных данных в исходных единицах температуры
+            Параметры:
+                    model(keras.src.models.model): модель
+                    X_test(np.array): нормализованные годы и месяцы
+                    y_test(np.array): нормализованные температуры
+                    scaler_y(MinMaxScaler): модель нормализации температур
+            Возвращаемое значение:
+                    evaluate_test(dict): mae и mse
+    '''
+
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    y_pred = scaler_y.inverse_transform(model.predict(X_test, verbose=verbose))
     y_true = scaler_y.inverse_transform(y_test)
-    evaluate_test["mae"] = mean_absolute_error(y_true, y_pred)
-    evaluate_test["mse"] = mean_squared_error(y_true, y_pred)
+    return {"mae": float(mean_absolute_error(y_true, y_pred)), "mse": float(mean_squared_error(y_true, y_pred))}
+
+
+def get_trained_months(aggregated_data:'pd.DataFrame') -> list[list]:
+    '''
+    Возвращает месяцы и средние температуры, на которых обучалась модель, в виде, пригодном для сведений файла модели
+            Параметры:
+                    aggregated_data(pd.DataFrame): средние температуры, индекс - (year, month), колонка - mean
+            Возвращаемое значение:
+                    trained_months(list[list]): строки [год, месяц, средняя температура]
+    '''
+
+    return [[int(year), int(month), float(temperature)] for (year, month), temperature in aggregated_data["mean"].items()]
+
+
+def get_new_months(aggregated_data:'pd.DataFrame', trained_months:list[list]) -> np.ndarray:
+    '''
+    Находит месяцы, которых не было при прошлом обучении или средняя температура которых изменилась
+            Параметры:
+                    aggregated_data(pd.DataFrame): средние температуры, индекс - (year, month), колонка - mean
+                    trained_months(list[list]): результат get_trained_months при прошлом обучении
+            Возвращаемое значение:
+                    is_new(np.ndarray): массив bool по строкам aggregated_data
+    '''
+
+    previous = {(year, month): temperature for year, month, temperature in trained_months}
+    return np.array([
+        (year, month) not in previous or abs(previous[(year, month)] - temperature) > INCREMENTAL_CHANGE_TOLERANCE
+        for (year, month), temperature in aggregated_data["mean"].items()
+    ], dtype=bool)
+
 
-    # Обучение модели
-    history = model.fit(X_test, y_test, epochs=epochs, verbose=verbose, callbacks=callbacks)
+def is_held_out_month(year:int, month:int) -> bool:
+    '''
+    Решает, попадает ли новый месяц в проверочную часть при дообучении. Решение зависит только от месяца,
+    поэтому не меняется, сколько бы месяцев ни добавилось, и в среднем откладывается доля TRAIN_TEST_SIZE
+            Параметры:
+                    year(int): год
+                    month(int): месяц
+            Возвращаемое значение:
+                    held_out(bool): проверочный ли месяц
+    '''
+
+    return np.random.default_rng([TRAIN_SPLIT_RANDOM_STATE, int(year), int(month)]).random() < TRAIN_TEST_SIZE
+
+
+def train_model_incremental(model_id:str, train_data_filename:str, epochs:int, verbose=1, callbacks=None) -> tuple:
+    '''
+    Дообучает модель на месяцах, которые появились или изменились с прошлого обучения. Нормализация остается прежней,
+    а веса дообучаются несколько эпох на новых месяцах вместе со случайной выборкой старых, чтобы модель не забыла прошлые данные.
+    Проверочные месяцы прошлого обучения остаются проверочными, на обучающие и проверочные делятся только новые месяцы
+            Параметры:
+                    model_id(str): id модели
+                    train_data_filename(str): имя файла, на котором происходит обучение
+                    epochs(int): количество эпох (не больше INCREMENTAL_EPOCHS)
+            Возвращаемое значение:
+                    train_data(tuple[dict, keras.src.models.model, dict, dict]): то же, что возвращает train_model,
+                    или None, если дообучение невозможно и нужно полное обучение
+    '''
+
+    import types
+
+    import_ml_stack()
+    from model_artifact import build_keras_model
+
+    artifact = load_artifact(model_id) if has_model_files(model_id) else None
+    if (artifact is None or "trained_months" not in artifact["meta"] or "test_months" not in artifact["meta"]
+            or artifact["scaler_X"] is None):
+        print(f"Модель {model_id} нельзя дообучить: неизвестно, на каких данных она обучалась. Выполняется полное обучение")
+        return None
+
+    aggregated_data = get_monthly_temperatures(train_data_filename)
+    X = np.column_stack((
+        aggregated_data.index.get_level_values('year').to_numpy(),
+        aggregated_data.index.get_level_values('month').to_numpy(),
+    ))
+    y = aggregated_data["mean"].to_numpy().reshape(-1, 1)
+
+    # Новую нормализацию пришлось бы подбирать заново, а вместе с ней и веса
+    scaler_X, scaler_y = artifact["scaler_X"], artifact["scaler_Y"]
+    if not (scaler_X.contains(X) and scaler_y.contains(y)):
+        print(f"Данные для модели {model_id} выходят за пределы прежней нормализации. Выполняется полное обучение")
+        return None
+
+    # Месяцы, на которых модель проверялась, остаются проверочными: на них она не обучалась, и оценка остается честной.
+    # Разбиение всех данных заново перемешало бы месяцы, и в проверку попали бы месяцы, на которых модель уже обучалась
+    known_months = {(year, month) for year, month, temperature in artifact["meta"]["trained_months"]}
+    test_months = {(year, month) for year, month in artifact["meta"]["test_months"]}
+    is_test = np.array([
+        (year, month) in test_months if (year, month) in known_months else is_held_out_month(year, month)
+        for year, month in X.tolist()
+    ], dtype=bool)
+    train_index = np.flatnonzero(~is_test)
+    test_index = np.flatnonzero(is_test)
+
+    is_new = get_new_months(aggregated_data, artifact["meta"]["trained_months"])
+    new_index = train_index[is_new[train_index]]
+    old_index = train_index[~is_new[train_index]]
+    replay_index = np.random.default_rng(TRAIN_SPLIT_RANDOM_STATE).choice(
+        old_index, size=min(INCREMENTAL_REPLAY_SIZE, len(old_index)), replace=False
+    )
+    fit_index = np.concatenate((new_index, replay_index))
+
+    X_scaled = scaler_X.transform(X)
+    y_scaled = scaler_y.transform(y)
+    model = build_keras_model(artifact)
+
+    if len(new_index):
+        fit_callbacks = list(callbacks or [])
+        fit_index, validation_index = split_validation(fit_index, fit_callbacks)
+        validation_data = None if validation_index is None else (X_scaled[validation_index], y_scaled[validation_index])
+        history = model.fit(
+            X_scaled[fit_index], y_scaled[fit_index], validation_data=validation_data,
+            epochs=min(epochs, INCREMENTAL_EPOCHS), verbose=verbose, callbacks=fit_callbacks
+        )
+    else:
+        # Новых месяцев для обучения нет, веса не меняются, модель только оценивается заново
+        history = types.SimpleNamespace(history={"loss": []})
+
+    evaluate_test = evaluate_model(model, X_scaled[test_index], y_scaled[test_index], scaler_y, verbose)
+    evaluate_test["test_months"] = X[test_index].tolist()
+    return history, model, evaluate_test, {"scaler_X": scaler_X, "scaler_Y": scaler_y}
+
+
+def train_harmonic_model(train_data_filename:str) -> tuple:
+    '''
+    Обучает гармоническую регрессию. Решение находится сразу, поэтому эпох и контрольных точек нет,
+    а данные делятся на обучающие и проверочные так же, как для нейросети, чтобы оценки были сравнимы
+            Параметры:
+                    train_data_filename(str): имя файла, на котором происходит обучение
+            Возвращаемое значение:
+                    train_data(tuple[object, HarmonicRegression, dict, dict]): history с потерями на обучающих данных,
+                    обученную модель, результаты оценки (mae, mse и проверочные месяцы test_months), пустые модели нормализации
+    '''
+
+    import types
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    aggregated_data = get_monthly_temperatures(train_data_filename)
+    X = np.column_stack((
+        aggregated_data.index.get_level_values('year').to_numpy(),
+        aggregated_data.index.get_level_values('month').to_numpy(),
+    ))
+    y = aggregated_data["mean"].to_numpy()
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TRAIN_TEST_SIZE, random_state=TRAIN_SPLIT_RANDOM_STATE)
+    model = get_harmonic_model().fit(X_train, y_train)
+
+    y_pred = model.predict(X_test).reshape(-1)
+    evaluate_test = {
+        "mae": float(mean_absolute_error(y_test, y_pred)), "mse": float(mean_squared_error(y_test, y_pred)),
+        "test_months": X_test.tolist(),
+    }
+    history = types.SimpleNamespace(history={"loss": [float(mean_squared_error(y_train, model.predict(X_train).reshape(-1)))]})
 
-    return history, model, evaluate_test, {"scaler_X": scaler_X, "scaler_Y": scaler_y}
\ No newline at end of file
+    return history, model, evaluate_test, {"scaler_X": None, "scaler_Y": None}
@@ -1,11 +1,24 @@
+import time
+STARTED_AT = time.perf_counter() # Время запуска для замера времени до первой отрисовки окна
+
 import sys
-from logic import restore_integrity
-from PyQt5.QtWidgets import QApplication
-from ui import App
+import multiprocessing
 
 if __name__ == "__main__":
+    # Нужно для процессов обучения в собранном exe
+    multiprocessing.freeze_support()
+
+    # С аргументами запускается командная строка, Qt при этом не импортируется
+    if len(sys.argv) > 1:
+        from cli import run_cli
+        sys.exit(run_cli(sys.argv[1:]))
+
+    from logic import restore_integrity
+    from PyQt5.QtWidgets import QApplication
+    from ui import App
+
     app = QApplication(sys.argv)
     restore_integrity()
-    window = App()
+    window = App(STARTED_AT)
     window.show()
-    sys.exit(app.exec_())
+    sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,220 @@
+# Файл модели: архитектура, веса, состояние оптимизатора, параметры нормализации и сведения
+# об обучении в одном архиве NumPy (.npz без pickle). Keras нужен только для сборки модели
+import hashlib
+import io
+import json
+import os
+import numpy as np
+
+from config import *
+
+
+class ScalerParams:
+    '''
+    Параметры MinMaxScaler в виде массивов чисел. Нормализует так же, как MinMaxScaler,
+    но не требует scikit-learn и сохраняется без pickle
+            Параметры:
+                    min_(np.array): сдвиг
+                    scale_(np.array): множитель
+                    data_min_(np.array): минимумы обучающих данных
+                    data_max_(np.array): максимумы обучающих данных
+                    feature_range(tuple[float, float]): диапазон нормализованных значений
+                    clip(bool): обрезать ли значения по диапазону
+    '''
+
+    FIELDS = ("min_", "scale_", "data_min_", "data_max_", "feature_range", "clip")
+
+    def __init__(self, min_, scale_, data_min_, data_max_, feature_range=(0, 1), clip=False):
+        self.min_ = np.asarray(min_, dtype=np.float64)
+        self.scale_ = np.asarray(scale_, dtype=np.float64)
+        self.data_min_ = np.asarray(data_min_, dtype=np.float64)
+        self.data_max_ = np.asarray(data_max_, dtype=np.float64)
+        self.feature_range = tuple(float(value) for value in feature_range)
+        self.clip = bool(clip)
+
+    @classmethod
+    def from_scaler(cls, scaler) -> 'ScalerParams':
+        '''
+        Возвращает параметры обученного MinMaxScaler (или ScalerParams)
+                Параметры:
+                        scaler(MinMaxScaler): модель нормализации (может быть None)
+                Возвращаемое значение:
+                        params(ScalerParams): параметры или None
+        '''
+
+        if scaler is None or isinstance(scaler, cls):
+            return scaler
+        return cls(scaler.min_, scaler.scale_, scaler.data_min_, scaler.data_max_,
+                   scaler.feature_range, getattr(scaler, "clip", False))
+
+    def transform(self, X:np.array) -> np.array:
+        scaled = np.asarray(X, dtype=np.float64) * self.scale_ + self.min_
+        if self.clip:
+            scaled = np.clip(scaled, *self.feature_range)
+        return scaled
+
+    def inverse_transform(self, X:np.array) -> np.array:
+        return (np.asarray(X, dtype=np.float64) - self.min_) / self.scale_
+
+    def contains(self, X:np.array) -> bool:
+        '''Проверяет, лежат ли все значения в диапазоне данных, на которых подбиралась нормализация'''
+
+        X = np.asarray(X, dtype=np.float64)
+        return bool(np.all(X >= self.data_min_) and np.all(X <= self.data_max_))
+
+
+def artifact_from_model(model:'keras.src.models.model', scalers:dict, meta:dict=None) -> dict:
+    '''
+    Собирает содержимое файла модели из модели Keras
+            Параметры:
+                    model(keras.src.models.model): модель
+                    scalers(dict): модели нормализации, ключи - scaler_X и scaler_Y (значения могут быть None)
+                    meta(dict): сведения о модели и обучении
+            Возвращаемое значение:
+                    artifact(dict): содержимое файла модели
+    '''
+
+    optimizer = getattr(model, "optimizer", None)
+    return {
+        "meta": dict(meta or {}),
+        "model_config": json.loads(model.to_json()),
+        "compile_config": model.get_compile_config() if model.compiled else None,
+        "weights": [np.asarray(weights) for weights in model.get_weights()],
+        "optimizer_variables": [np.asarray(variable) for variable in optimizer.variables] if optimizer is not None else [],
+        "scaler_X": ScalerParams.from_scaler(scalers.get("scaler_X")),
+        "scaler_Y": ScalerParams.from_scaler(scalers.get("scaler_Y")),
+    }
+
+
+def artifact_to_arrays(artifact:dict) -> dict:
+    '''
+    Переводит содержимое файла модели в именованные массивы для записи в архив
+            Параметры:
+                    artifact(dict): содержимое файла модели
+            Возвращаемое значение:
+                    arrays(dict[str:np.array]): массивы
+    '''
+
+    arrays = {
+        "format": np.array(MODEL_ARTIFACT_FORMAT_VERSION),
+        "meta": np.array(json.dumps(artifact["meta"], ensure_ascii=False)),
+        "model_config": np.array(json.dumps(artifact["model_config"], sort_keys=True)),
+        "compile_config": np.array(json.dumps(artifact["compile_config"], sort_keys=True)),
+    }
+    for i, weights in enumerate(artifact["weights"]):
+        arrays[f"weight_{i}"] = np.asarray(weights)
+    for i, variable in enumerate(artifact["optimizer_variables"]):
+        arrays[f"optimizer_{i}"] = np.asarray(variable)
+    for name in ("scaler_X", "scaler_Y"):
+        if artifact[name] is not None:
+            for field in ScalerParams.FIELDS:
+                arrays[f"{name}.{field}"] = np.asarray(getattr(artifact[name], field))
+    return arrays
+
+
+def get_artifact_hash(artifact:dict) -> str:
+    '''
+    Возвращает хэш содержимого модели: архитектуры, весов, состояния оптимизатора и нормализации.
+    Сведения об обучении (meta) и устройство архива в хэш не входят, поэтому одинаковые модели,
+    сохраненные в разное время или импортированные из разных файлов, получают один хэш.
+    Сведения каждой модели хранятся в реестре (get_model_meta)
+            Параметры:
+                    artifact(dict): содержимое файла модели
+            Возвращаемое значение:
+                    hash(str): SHA-256 в шестнадцатеричном виде
+    '''
+
+    arrays = artifact_to_arrays(artifact)
+    del arrays["meta"]
+
+    content_hash = hashlib.sha256()
+    for key in sorted(arrays):
+        array = np.ascontiguousarray(arrays[key])
+        content_hash.update(f"{key}:{array.dtype.str}:{array.shape};".encode("utf-8"))
+        content_hash.update(array.tobytes())
+    return content_hash.hexdigest()
+
+
+def write_artifact(path:str, artifact:dict) -> int:
+    '''
+    Записывает файл модели. Файл сначала пишется рядом и затем переименовывается,
+    поэтому при сбое на диске остается старая версия целиком
+            Параметры:
+                    path(str): путь к файлу
+                    artifact(dict): содержимое файла модели
+            Возвращаемое значение:
+                    size(int): размер файла в байтах
+    '''
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **artifact_to_arrays(artifact))
+    data = buffer.getvalue()
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def read_artifact(path:str) -> dict:
+    '''
+    Читает файл модели за одно обращение к диску
+            Параметры:
+                    path(str): путь к файлу
+            Возвращаемое значение:
+                    artifact(dict): содержимое файла модели
+    '''
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        arrays = {key: arrays[key] for key in arrays.files}
+
+    if int(arrays["format"]) > MODEL_ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Файл модели создан более новой версией приложения: {path}")
+
+    artifact = {
+        "meta": json.loads(str(arrays["meta"])),
+        "model_config": json.loads(str(arrays["model_config"])),
+        "compile_config": json.loads(str(arrays["compile_config"])),
+        "weights": [],
+        "optimizer_variables": [],
+        "size": len(data),
+    }
+    while f"weight_{len(artifact['weights'])}" in arrays:
+        artifact["weights"].append(arrays[f"weight_{len(artifact['weights'])}"])
+    while f"optimizer_{len(artifact['optimizer_variables'])}" in arrays:
+        artifact["optimizer_variables"].append(arrays[f"optimizer_{len(artifact['optimizer_variables'])}"])
+    for name in ("scaler_X", "scaler_Y"):
+        if f"{name}.min_" in arrays:
+            artifact[name] = ScalerParams(*(arrays[f"{name}.{field}"] for field in ScalerParams.FIELDS))
+        else:
+            artifact[name] = None
+
+    return artifact
+
+
+def build_keras_model(artifact:dict) -> 'keras.src.models.model':
+    '''
+    Собирает модель Keras из файла модели вместе с состоянием оптимизатора
+            Параметры:
+                    artifact(dict): содержимое файла модели
+            Возвращаемое значение:
+                    model(keras.src.models.model): модель
+    '''
+
+    from keras.models import model_from_json
+
+    model = model_from_json(json.dumps(artifact["model_config"]))
+    model.set_weights(artifact["weights"])
+
+    if artifact["compile_config"] is not None:
+        model.compile_from_config(artifact["compile_config"])
+        variables = model.optimizer.variables
+        if len(variables) == len(artifact["optimizer_variables"]):
+            for variable, value in zip(variables, artifact["optimizer_variables"]):
+                variable.assign(value)
+
+    return model
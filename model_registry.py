@@ -0,0 +1,380 @@
+# Реестр моделей во встроенной базе SQLite: одна строка на модель, изменения пишутся по одной строке.
+# Файлы моделей хранятся по хэшу содержимого, таблица blobs считает, сколько моделей ссылается на каждый.
+# У каждого потока свое соединение, поэтому реестр можно менять из потоков обучения
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+from config import *
+
+_registry_local = threading.local()
+_registry_init_lock = threading.Lock()
+_registry_ready = False
+
+MODEL_FIELDS = ("name", "description", "model_type", "artifact_path", "blob_hash", "size", "mtime", "mae", "mse", "trained_at", "created_at")
+
+
+def get_registry_connection() -> sqlite3.Connection:
+    '''
+    Возвращает соединение с реестром для текущего потока и при первом обращении создает таблицы
+            Возвращаемое значение:
+                    connection(sqlite3.Connection): соединение
+    '''
+
+    connection = getattr(_registry_local, "connection", None)
+    if connection is None:
+        connection = sqlite3.connect(MODELS_REGISTRY_PATH, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        _registry_local.connection = connection
+
+    global _registry_ready
+    if not _registry_ready:
+        with _registry_init_lock:
+            if not _registry_ready:
+                init_registry(connection)
+                _registry_ready = True
+
+    return connection
+
+
+def init_registry(connection:sqlite3.Connection) -> None:
+    '''
+    Создает таблицы реестра. Новый реестр заполняется из старого файла описания моделей,
+    стандартная модель добавляется всегда
+            Параметры:
+                    connection(sqlite3.Connection): соединение
+    '''
+
+    with connection:
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS models (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                description TEXT NOT NULL,
+                artifact_path TEXT,
+                size INTEGER,
+                mtime INTEGER,
+                mae REAL,
+                mse REAL,
+                trained_at TEXT,
+                created_at TEXT,
+                blob_hash TEXT,
+                model_type TEXT,
+                meta TEXT
+            )
+        ''')
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER,
+                refcount INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+
+        # Реестр старой версии дополняем ссылкой на файл, типом модели и сведениями об обучении
+        columns = [row["name"] for row in connection.execute("PRAGMA table_info(models)")]
+        for column in ("blob_hash", "model_type", "meta"):
+            if column not in columns:
+                connection.execute(f"ALTER TABLE models ADD COLUMN {column} TEXT")
+        connection.execute("CREATE INDEX IF NOT EXISTS models_blob_hash ON models (blob_hash)")
+
+        is_new = connection.execute("SELECT COUNT(*) FROM models").fetchone()[0] == 0
+        insert_model_row(connection, STANDARD_MODEL_ID, STANDARD_MODEL_NAME, STANDARD_MODEL_DESCRIPTION)
+
+        if is_new:
+            try:
+                with open(MODELS_DESCRIPTION_FILENAME) as f:
+                    descriptions = json.load(f)
+            except (OSError, ValueError):
+                # Ничего не делаем, если файла нет
+                descriptions = {}
+
+            for model_id, description in descriptions.items():
+                insert_model_row(connection, model_id, description.get("name", DEFAULT_MODEL_NAME),
+                                 description.get("description", DEFAULT_DESCRIPTION))
+
+
+def insert_model_row(connection:sqlite3.Connection, model_id:str, name:str, description:str) -> None:
+    connection.execute(
+        "INSERT OR IGNORE INTO models (id, name, description, created_at) VALUES (?, ?, ?, ?)",
+        (model_id, name, description, time.strftime("%Y-%m-%d %H:%M:%S"))
+    )
+
+
+def get_models() -> dict[str:dict]:
+    '''
+    Возвращает модели из реестра в порядке добавления
+            Возвращаемое значение:
+                    models (dict[str:dict]): словарь моделей, ключ - ID, значение - словарь со свойствами
+    '''
+
+    # Сведения об обучении (meta) могут быть большими и для списка моделей не нужны
+    rows = get_registry_connection().execute(f"SELECT id, {', '.join(MODEL_FIELDS)} FROM models ORDER BY rowid")
+    return {row["id"]: {field: row[field] for field in MODEL_FIELDS} for row in rows}
+
+
+def build_models_index(models:dict[str:dict]) -> list[tuple[str, str, dict]]:
+    '''
+    Строит индекс для поиска моделей в памяти
+            Параметры:
+                    models(dict[str:dict]): модели, как их возвращает get_models
+            Возвращаемое значение:
+                    index(list[tuple[str, str, dict]]): id модели, имя и описание в нижнем регистре, метрики
+    '''
+
+    return [
+        (model_id, f"{model_data['name']}\n{model_data['description']}".lower(),
+         {metric: model_data.get(metric) for metric in MODEL_SEARCH_METRICS})
+        for model_id, model_data in models.items()
+    ]
+
+
+def search_models(index:list[tuple[str, str, dict]], query:str) -> list[str]:
+    '''
+    Ищет модели по индексу. Слова запроса ищутся в имени и описании, условия вида mae<1.5
+    сравнивают метрики (модели без метрики под условие не подходят)
+            Параметры:
+                    index(list[tuple[str, str, dict]]): индекс из build_models_index
+                    query(str): строка запроса
+            Возвращаемое значение:
+                    model_ids(list[str]): id подходящих моделей в порядке индекса
+    '''
+
+    words, conditions = [], []
+    for token in query.lower().split():
+        match = re.fullmatch(rf"({'|'.join(MODEL_SEARCH_METRICS)})(<=|>=|<|>|=)(-?\d+(?:[.,]\d+)?)", token)
+        if match:
+            conditions.append((match[1], match[2], float(match[3].replace(",", "."))))
+        else:
+            words.append(token)
+
+    compare = {
+        "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+        ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+        "=": lambda a, b: abs(a - b) < 1e-9,
+    }
+    return [
+        model_id for model_id, text, metrics in index
+        if all(word in text for word in words)
+        and all(metrics[metric] is not None and compare[op](metrics[metric], value) for metric, op, value in conditions)
+    ]
+
+
+def is_valid_model_id(model_id:str) -> bool:
+    '''
+    Проверяет, что id модели можно подставлять в имена файлов: это UUID или простое имя без пути
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    valid(bool): допустим ли id
+    '''
+
+    if not isinstance(model_id, str):
+        return False
+    try:
+        uuid.UUID(model_id)
+        return True
+    except ValueError:
+        return re.fullmatch(r"[\w\-]+", model_id) is not None
+
+
+def get_model_record(model_id:str) -> dict:
+    '''
+    Возвращает запись модели из реестра
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    record(dict): свойства модели или None, если модели нет в реестре или id недопустим
+    '''
+
+    if not is_valid_model_id(model_id):
+        return None
+    row = get_registry_connection().execute("SELECT * FROM models WHERE id = ?", (model_id,)).fetchone()
+    return None if row is None else {field: row[field] for field in MODEL_FIELDS}
+
+
+def get_model_meta(model_id:str) -> dict:
+    '''
+    Возвращает сведения об обучении модели. Они хранятся в реестре, а не в файле модели,
+    потому что один файл может принадлежать нескольким моделям с одинаковыми весами
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    meta(dict): сведения или None, если модель сохранялась до появления сведений в реестре
+    '''
+
+    if not is_valid_model_id(model_id):
+        return None
+    row = get_registry_connection().execute("SELECT meta FROM models WHERE id = ?", (model_id,)).fetchone()
+    return None if row is None or row["meta"] is None else json.loads(row["meta"])
+
+
+def add_model_record(model_id:str, name:str, description:str) -> dict:
+    '''
+    Добавляет модель в реестр
+            Параметры:
+                    model_id(str): id модели
+                    name(str): имя
+                    description(str): описание
+            Возвращаемое значение:
+                    record(dict): свойства модели
+    '''
+
+    if not is_valid_model_id(model_id):
+        raise ValueError(f"Недопустимый id модели: {model_id}")
+
+    connection = get_registry_connection()
+    with connection:
+        insert_model_row(connection, model_id, name, description)
+    return get_model_record(model_id)
+
+
+def update_model_record(model_id:str, **fields) -> None:
+    '''
+    Меняет свойства одной модели в реестре
+            Параметры:
+                    model_id(str): id модели
+                    fields: новые значения полей из MODEL_FIELDS
+    '''
+
+    unknown = set(fields) - set(MODEL_FIELDS)
+    if unknown:
+        raise ValueError(f"Неизвестные поля реестра моделей: {', '.join(unknown)}")
+    if not fields:
+        return
+
+    connection = get_registry_connection()
+    with connection:
+        connection.execute(
+            f"UPDATE models SET {', '.join(field + ' = ?' for field in fields)} WHERE id = ?",
+            (*fields.values(), model_id)
+        )
+
+
+def release_blob(connection:sqlite3.Connection, blob_hash:str) -> str:
+    '''
+    Уменьшает счетчик ссылок на файл модели и удаляет его запись, если ссылок не осталось
+            Параметры:
+                    connection(sqlite3.Connection): соединение с открытой транзакцией
+                    blob_hash(str): хэш файла (может быть None)
+            Возвращаемое значение:
+                    blob_hash(str): хэш файла, который больше не нужен, или None
+    '''
+
+    if blob_hash is None:
+        return None
+
+    connection.execute("UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?", (blob_hash,))
+    row = connection.execute("SELECT refcount FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()
+    if row is not None and row["refcount"] <= 0:
+        connection.execute("DELETE FROM blobs WHERE hash = ?", (blob_hash,))
+        return blob_hash
+    return None
+
+
+def link_model_blob(model_id:str, blob_hash:str, path:str, meta:dict, ensure_file) -> str:
+    '''
+    Привязывает модель к файлу с заданным хэшем и запоминает сведения об обучении модели.
+    Файл проверяется и при необходимости записывается внутри той же транзакции, поэтому другой поток
+    не удалит его между проверкой и привязкой (удаление тоже идет под блокировкой реестра, см. remove_unused_blob).
+    Модель должна быть в реестре: удаленная модель (например, во время обучения) не создается заново
+            Параметры:
+                    model_id(str): id модели
+                    blob_hash(str): хэш содержимого
+                    path(str): путь к файлу
+                    meta(dict): сведения о модели и обучении
+                    ensure_file(function): записывает файл, если его нет, и возвращает его размер и время изменения
+            Возвращаемое значение:
+                    blob_hash(str): хэш прежнего файла модели, на который больше никто не ссылается, или None
+    '''
+
+    connection = get_registry_connection()
+    with connection:
+        # Транзакция сразу берет блокировку записи, чтобы счетчики не разошлись при одновременном сохранении
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute("SELECT blob_hash FROM models WHERE id = ?", (model_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Модели {model_id} нет в реестре, файл модели не сохранен")
+        size, mtime = ensure_file()
+        connection.execute("UPDATE models SET meta = ? WHERE id = ?", (json.dumps(meta, ensure_ascii=False), model_id))
+
+        old_hash = row["blob_hash"]
+        if old_hash == blob_hash:
+            return None
+
+        connection.execute("INSERT OR IGNORE INTO blobs (hash, path, size) VALUES (?, ?, ?)", (blob_hash, path, size))
+        connection.execute("UPDATE blobs SET refcount = refcount + 1 WHERE hash = ?", (blob_hash,))
+        connection.execute(
+            "UPDATE models SET blob_hash = ?, artifact_path = ?, size = ?, mtime = ? WHERE id = ?",
+            (blob_hash, path, size, mtime, model_id)
+        )
+        return release_blob(connection, old_hash)
+
+
+def remove_unused_blob(blob_hash:str, remove_file) -> bool:
+    '''
+    Удаляет файл модели, если на него так и не появилось ссылок. Проверка и удаление идут под блокировкой
+    записи реестра, чтобы не удалить файл, к которому только что привязал модель другой поток
+            Параметры:
+                    blob_hash(str): хэш файла
+                    remove_file(function): удаляет файл
+            Возвращаемое значение:
+                    removed(bool): удален ли файл
+    '''
+
+    connection = get_registry_connection()
+    with connection:
+        connection.execute("BEGIN IMMEDIATE")
+        if connection.execute("SELECT 1 FROM blobs WHERE hash = ?", (blob_hash,)).fetchone() is not None:
+            return False
+        remove_file()
+        return True
+
+
+def get_blobs() -> dict[str:dict]:
+    '''
+    Возвращает файлы моделей, на которые есть ссылки
+            Возвращаемое значение:
+                    blobs(dict[str:dict]): ключ - хэш, значение - путь, размер и количество ссылок
+    '''
+
+    rows = get_registry_connection().execute("SELECT * FROM blobs")
+    return {row["hash"]: {"path": row["path"], "size": row["size"], "refcount": row["refcount"]} for row in rows}
+
+
+def recount_blobs() -> list[str]:
+    '''
+    Пересчитывает ссылки на файлы моделей по таблице моделей и удаляет записи файлов без ссылок
+            Возвращаемое значение:
+                    hashes(list[str]): хэши файлов, которые больше не нужны
+    '''
+
+    connection = get_registry_connection()
+    with connection:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("UPDATE blobs SET refcount = (SELECT COUNT(*) FROM models WHERE models.blob_hash = blobs.hash)")
+        freed = [row["hash"] for row in connection.execute("SELECT hash FROM blobs WHERE refcount <= 0")]
+        connection.execute("DELETE FROM blobs WHERE refcount <= 0")
+    return freed
+
+
+def delete_model_record(model_id:str) -> str:
+    '''
+    Удаляет модель из реестра
+            Параметры:
+                    model_id(str): id модели
+            Возвращаемое значение:
+                    blob_hash(str): хэш файла модели, на который больше никто не ссылается, или None
+    '''
+
+    connection = get_registry_connection()
+    with connection:
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute("SELECT blob_hash FROM models WHERE id = ?", (model_id,)).fetchone()
+        connection.execute("DELETE FROM models WHERE id = ?", (model_id,))
+        return None if row is None else release_blob(connection, row["blob_hash"])
@@ -0,0 +1,270 @@
+# Локальный HTTP-сервер предсказаний. Модели из реестра держатся загруженными в кэше logic,
+# а запросы, пришедшие почти одновременно, считаются одним проходом модели
+import json
+import queue
+import threading
+import time
+import numpy as np
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from logic import *
+from config import *
+
+
+class ServerStats:
+    '''Счетчики задержки и пропускной способности сервера'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.latencies = deque(maxlen=SERVER_STATS_WINDOW)
+
+    def add_request(self, latency:float, error:bool=False) -> None:
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.latencies.append(latency)
+
+    def add_batch(self, size:int) -> None:
+        with self.lock:
+            self.batches += 1
+            self.batched_requests += size
+
+    def get(self) -> dict:
+        '''
+        Возвращает счетчики сервера
+                Возвращаемое значение:
+                        stats(dict): число запросов, ошибок и пакетов, средний размер пакета,
+                        запросов в секунду и задержки в миллисекундах по последним запросам
+        '''
+
+        with self.lock:
+            uptime = time.perf_counter() - self.started_at
+            latencies = np.array(self.latencies) * 1000
+            stats = {
+                "uptime": uptime,
+                "requests": self.requests,
+                "errors": self.errors,
+                "batches": self.batches,
+                "mean_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+                "requests_per_second": self.requests / uptime if uptime else 0.0,
+            }
+
+        if len(latencies):
+            stats["latency_ms"] = {
+                "mean": float(latencies.mean()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+            }
+        return stats
+
+
+class PredictionBatcher:
+    '''
+    Собирает запросы, пришедшие в течение окна SERVER_BATCH_WINDOW, и считает их
+    одним проходом для каждой модели
+    '''
+
+    def __init__(self, stats:ServerStats):
+        self.stats = stats
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def predict(self, model_id:str, years:list[int]) -> np.ndarray:
+        '''
+        Ставит запрос в очередь и ждет результата
+                Параметры:
+                        model_id(str): id модели
+                        years(list[int]): годы
+                Возвращаемое значение:
+                        temperatures(np.ndarray): массив размера (len(years), 12) или None, если модель не загрузилась
+        '''
+
+        request = {"model_id": model_id, "years": years, "done": threading.Event(), "result": None}
+        self.requests.put(request)
+        request["done"].wait()
+        return request["result"]
+
+    def collect_batch(self) -> list[dict]:
+        batch = [self.requests.get()]
+        deadline = time.perf_counter() + SERVER_BATCH_WINDOW
+        while len(batch) < SERVER_MAX_BATCH_SIZE:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect_batch()
+            self.stats.add_batch(len(batch))
+
+            by_model = {}
+            for request in batch:
+                by_model.setdefault(request["model_id"], []).append(request)
+
+            for model_id, requests in by_model.items():
+                try:
+                    engine = get_inference_engine(model_id)
+                    if engine is not None:
+                        years = [year for request in requests for year in request["years"]]
+                        temperatures = predict_months(engine, years)
+                        start = 0
+                        for request in requests:
+                            request["result"] = temperatures[start:start + len(request["years"])]
+                            start += len(request["years"])
+                except Exception as e:
+                    print(f"Ошибка предсказания модели {model_id}: {e}")
+                finally:
+                    for request in requests:
+                        request["done"].set()
+
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    '''
+    HTTP-сервер, который обрабатывает запросы в постоянном пуле потоков, а не в новом потоке на каждый запрос.
+    Соединение с реестром открывается отдельно для каждого потока, поэтому потоки пула открывают его один раз
+            Параметры:
+                    address(tuple[str, int]): адрес и порт
+                    handler(type): класс обработчика запросов
+                    threads(int): количество потоков
+    '''
+
+    def __init__(self, address, handler, threads=SERVER_THREADS):
+        super().__init__(address, handler)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="server")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    '''
+    Обработчик запросов:
+        /predict?model_id=<id>&year=<год>[&month=<месяц>] - температура по месяцам года или за один месяц
+        /models - список моделей
+        /stats - счетчики задержки и пропускной способности
+    '''
+
+    def send_json(self, code:int, data) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        started_at = time.perf_counter()
+        url = urlparse(self.path)
+        code, data = 404, {"error": "неизвестный адрес"}
+
+        try:
+            if url.path == "/predict":
+                code, data = self.predict(parse_qs(url.query))
+            elif url.path == "/models":
+                code, data = 200, [
+                    {"id": model_id, "name": model_data["name"], "description": model_data["description"],
+                     "model_type": model_data["model_type"], "mae": model_data["mae"], "mse": model_data["mse"], "trained_at": model_data["trained_at"]}
+                    for model_id, model_data in get_models().items()
+                ]
+            elif url.path == "/stats":
+                code, data = 200, self.server.stats.get()
+        except Exception as e:
+            code, data = 500, {"error": str(e)}
+
+        self.send_json(code, data)
+        if url.path == "/predict":
+            self.server.stats.add_request(time.perf_counter() - started_at, code != 200)
+
+    def predict(self, query:dict) -> tuple[int, dict]:
+        try:
+            model_id = query["model_id"][0]
+            year = int(query["year"][0])
+            month = int(query["month"][0]) if "month" in query else None
+        except (KeyError, ValueError):
+            return 400, {"error": "нужны параметры model_id, year и необязательный month"}
+
+        if month is not None and not 1 <= month <= 12:
+            return 400, {"error": "месяц должен быть от 1 до 12"}
+
+        # Неизвестные и недопустимые id отсекаются до того, как по ним будет построен путь к файлу
+        if get_model_record(model_id) is None:
+            return 404, {"error": f"модель {model_id} не найдена"}
+
+        temperatures = self.server.batcher.predict(model_id, [year])
+        if temperatures is None:
+            return 404, {"error": f"модель {model_id} не загрузилась"}
+
+        if month is None:
+            return 200, {"model_id": model_id, "year": year, "temperatures": temperatures[0].tolist()}
+        return 200, {"model_id": model_id, "year": year, "month": month, "temperature": float(temperatures[0, month - 1])}
+
+    def log_message(self, format, *args):
+        # Не печатаем каждый запрос, иначе при нагрузочном тесте вывод станет узким местом
+        pass
+
+
+def warm_up_models(count:int=SERVER_WARM_UP_MODELS) -> None:
+    '''
+    Загружает модели с диска в кэш, чтобы первые запросы не ждали загрузки. Загружаются только первые count
+    обученных моделей в порядке реестра: кэш держит не больше MODEL_CACHE_SIZE моделей, остальные загрузятся при первом запросе
+            Параметры:
+                    count(int): сколько моделей загрузить (0 - не загружать)
+    '''
+
+    if count <= 0:
+        return
+
+    import_ml_stack()
+    model_ids = [model_id for model_id, model_data in get_models().items() if model_data["blob_hash"] is not None]
+    for model_id in model_ids[:min(count, MODEL_CACHE_SIZE)]:
+        engine = get_inference_engine(model_id)
+        if engine is not None:
+            predict_months(engine, [INPUT_YEAR_VALUE_FROM])
+
+
+def run_server(host:str=SERVER_HOST, port:int=SERVER_PORT, warm_up:int=SERVER_WARM_UP_MODELS, threads:int=SERVER_THREADS) -> None:
+    '''
+    Запускает сервер предсказаний и обслуживает запросы до остановки
+            Параметры:
+                    host(str): адрес
+                    port(int): порт
+                    warm_up(int): сколько первых моделей реестра загрузить при запуске
+                    threads(int): сколько потоков обрабатывают запросы
+    '''
+
+    restore_integrity()
+    warm_up_models(warm_up)
+
+    server = PooledHTTPServer((host, port), PredictionRequestHandler, threads)
+    server.daemon_threads = True
+    server.stats = ServerStats()
+    server.batcher = PredictionBatcher(server.stats)
+
+    print(f"Сервер предсказаний запущен на http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -19,6 +19,7 @@ QLabel#tempValueLabel,
 TrainDialog QLineEdit#epochsInput,
 TrainDialog QButtonGroup#trainModeRadio,
 TrainDialog QRadioButton#trainModeRadio,
+TrainDialog QCheckBox#trainOptionCheckBox,
 ErrorDialog QLabel#dialogLabel,
 CustomInputDialog QLabel#dialogLabel {
     font-weight: 500;
@@ -266,6 +267,14 @@ QLineEdit#epochsInput {
     color: #E0E7FF;
 }
 
+QLineEdit#modelSearchInput {
+    border: 1px solid;
+    border-radius: 5px;
+    padding: 5px;
+    margin: 10px 15px 0 15px;
+    color: #E0E7FF;
+}
+
 /* ==========================================================================
    Стили для радио-кнопок
    ========================================================================== */
@@ -289,6 +298,21 @@ QRadioButton#trainModeRadio::indicator:unchecked {
     border-radius: 8px;
 }
 
+/* ==========================================================================
+   Стили для флажков
+   ========================================================================== */
+QCheckBox#trainOptionCheckBox {
+    font-size: 12px;
+    color: #E0E7FF;
+}
+
+QCheckBox#trainOptionCheckBox::indicator {
+    width: 14px;
+    height: 14px;
+    border: 2px solid;
+    border-radius: 4px;
+}
+
 /* ==========================================================================
    Стили для индикатора прогресса
    ========================================================================== */
@@ -484,7 +508,8 @@ QFrame#modelCard {
 /* ==========================================================================
    Стили для полей ввода
    ========================================================================== */
-QLineEdit#epochsInput {
+QLineEdit#epochsInput,
+QLineEdit#modelSearchInput {
     background-color: #2A3A4A;
     border-color: #3A5A7A;
 }
@@ -492,12 +517,14 @@ QLineEdit#epochsInput {
 /* ==========================================================================
    Стили для радио-кнопок
    ========================================================================== */
-QRadioButton#trainModeRadio::indicator:checked {
+QRadioButton#trainModeRadio::indicator:checked,
+QCheckBox#trainOptionCheckBox::indicator:checked {
     background-color: #4C6DC2;
     border-color: #3A5A7A;
 }
 
-QRadioButton#trainModeRadio::indicator:unchecked {
+QRadioButton#trainModeRadio::indicator:unchecked,
+QCheckBox#trainOptionCheckBox::indicator:unchecked {
     border-color: #3A5A7A;
 }
 
@@ -734,7 +761,8 @@ QFrame#modelCard {
 /* ==========================================================================
    Стили для полей ввода
    ========================================================================== */
-QLineEdit#epochsInput {
+QLineEdit#epochsInput,
+QLineEdit#modelSearchInput {
     background-color: #3A2A3A;
     border-color: #5A3A5A;
 }
@@ -742,12 +770,14 @@ QLineEdit#epochsInput {
 /* ==========================================================================
    Стили для радио-кнопок
    ========================================================================== */
-QRadioButton#trainModeRadio::indicator:checked {
+QRadioButton#trainModeRadio::indicator:checked,
+QCheckBox#trainOptionCheckBox::indicator:checked {
     background-color: #3A2A3A;
     border-color: #5A3A5A;
 }
 
-QRadioButton#trainModeRadio::indicator:unchecked {
+QRadioButton#trainModeRadio::indicator:unchecked,
+QCheckBox#trainOptionCheckBox::indicator:unchecked {
     border-color: #5A3A5A;
 }
 
@@ -984,7 +1014,8 @@ QFrame#modelCard {
 /* ==========================================================================
    Стили для полей ввода
    ========================================================================== */
-QLineEdit#epochsInput {
+QLineEdit#epochsInput,
+QLineEdit#modelSearchInput {
     background-color: #1A3A5A;
     border-color: #2A5A8A;
 }
@@ -992,12 +1023,14 @@ QLineEdit#epochsInput {
 /* ==========================================================================
    Стили для радио-кнопок
    ========================================================================== */
-QRadioButton#trainModeRadio::indicator:checked {
+QRadioButton#trainModeRadio::indicator:checked,
+QCheckBox#trainOptionCheckBox::indicator:checked {
     background-color: #66B3FF;
     border-color: #2A5A8A;
 }
 
-QRadioButton#trainModeRadio::indicator:unchecked {
+QRadioButton#trainModeRadio::indicator:unchecked,
+QCheckBox#trainOptionCheckBox::indicator:unchecked {
     border-color: #2A5A8A;
 }
 
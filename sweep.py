@@ -0,0 +1,205 @@
+# Подбор гиперпараметров полносвязной модели. Данные разбираются и нормализуются один раз,
+# варианты обучаются параллельно в пуле процессов очереди обучения, слабые варианты останавливаются досрочно
+import csv
+import itertools
+import math
+import multiprocessing
+import random
+import time
+import uuid
+
+from concurrent.futures import as_completed
+
+from logic import *
+from training_queue import create_worker_pool, get_workers_count
+from config import *
+
+
+def get_sweep_trials(units:list[tuple[int]]=SWEEP_UNITS, learning_rates:list[float]=SWEEP_LEARNING_RATES,
+                     batch_sizes:list[int]=SWEEP_BATCH_SIZES, epochs:list[int]=SWEEP_EPOCHS,
+                     trials:int=None, seed:int=SWEEP_RANDOM_SEED) -> list[dict]:
+    '''
+    Возвращает варианты гиперпараметров: все сочетания или случайную выборку из них
+            Параметры:
+                    units(list[tuple[int]]): варианты скрытых слоев (количество нейронов в каждом слое)
+                    learning_rates(list[float]): варианты скорости обучения
+                    batch_sizes(list[int]): варианты размера пакета
+                    epochs(list[int]): варианты количества эпох
+                    trials(int): сколько вариантов выбрать (None - все сочетания)
+                    seed(int): зерно случайной выборки
+            Возвращаемое значение:
+                    trials(list[dict]): варианты с номером trial_id
+    '''
+
+    grid = [
+        {"units": tuple(layer_units), "learning_rate": learning_rate, "batch_size": batch_size, "epochs": trial_epochs}
+        for layer_units, learning_rate, batch_size, trial_epochs in itertools.product(units, learning_rates, batch_sizes, epochs)
+    ]
+    if trials is not None and trials < len(grid):
+        grid = random.Random(seed).sample(grid, trials)
+
+    for trial_id, trial in enumerate(grid):
+        trial["trial_id"] = trial_id
+    return grid
+
+
+def prepare_sweep_data(train_data_filename:str) -> dict:
+    '''
+    Разбирает файл с данными, нормализует его и делит на обучающую и проверочную части так же, как train_model.
+    От обучающей части, как в split_validation, отделяются месяцы для отбора: по ним останавливаются и сравниваются варианты,
+    а проверочная часть нужна только для итоговых MAE и MSE
+            Параметры:
+                    train_data_filename(str): файл с данными
+            Возвращаемое значение:
+                    data(dict): X_train, X_val, X_test, y_train, y_val, y_test, параметры нормализации scaler_X, scaler_Y,
+                                месяцы trained_months и проверочные месяцы test_months для дообучения
+    '''
+
+    from sklearn.preprocessing import MinMaxScaler
+    from sklearn.model_selection import train_test_split
+    from model_artifact import ScalerParams
+
+    aggregated_data = get_monthly_temperatures(train_data_filename)
+    years = aggregated_data.index.get_level_values('year').to_numpy()
+    months = aggregated_data.index.get_level_values('month').to_numpy()
+    temperatures = aggregated_data["mean"].to_numpy()
+
+    scaler_X = MinMaxScaler()
+    scaler_y = MinMaxScaler()
+    X_scaled, y_scaled = get_sсaled_data(years, months, temperatures, scaler_X, scaler_y)
+    train_index, test_index = train_test_split(
+        np.arange(len(X_scaled)), test_size=TRAIN_TEST_SIZE, random_state=TRAIN_SPLIT_RANDOM_STATE
+    )
+    fit_index, validation_index = train_test_split(train_index, test_size=TRAIN_VALIDATION_SIZE, random_state=TRAIN_SPLIT_RANDOM_STATE)
+
+    return {
+        "X_train": X_scaled[fit_index], "X_val": X_scaled[validation_index], "X_test": X_scaled[test_index],
+        "y_train": y_scaled[fit_index], "y_val": y_scaled[validation_index], "y_test": y_scaled[test_index],
+        "scaler_X": ScalerParams.from_scaler(scaler_X), "scaler_Y": ScalerParams.from_scaler(scaler_y),
+        "trained_months": get_trained_months(aggregated_data),
+        "test_months": [[int(years[i]), int(months[i])] for i in test_index],
+    }
+
+
+def run_sweep_trial(trial:dict, data:dict, reports:dict, lock:'multiprocessing.Lock') -> dict:
+    '''
+    Обучает и оценивает один вариант. Выполняется в процессе пула обучения
+            Параметры:
+                    trial(dict): гиперпараметры варианта
+                    data(dict): данные из prepare_sweep_data
+                    reports(dict): общий словарь потерь для досрочной остановки
+                    lock(multiprocessing.Lock): блокировка общего словаря
+            Возвращаемое значение:
+                    result(dict): вариант, состояние, MAE отбора val_mae, MAE и MSE на проверочной части,
+                                  пройденные эпохи, время и содержимое файла модели
+    '''
+
+    import keras
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+    from model_artifact import artifact_from_model
+    from training_callbacks import MedianPruning
+
+    started_at = time.perf_counter()
+    result = dict(trial)
+    try:
+        keras.utils.set_random_seed(SWEEP_RANDOM_SEED + trial["trial_id"])
+        model = build_dense_model(trial["units"], learning_rate=trial["learning_rate"])
+        pruning = MedianPruning(reports, lock)
+        history = model.fit(
+            data["X_train"], data["y_train"], validation_data=(data["X_val"], data["y_val"]),
+            epochs=trial["epochs"], batch_size=trial["batch_size"], verbose=0, callbacks=[pruning]
+        )
+
+        # Варианты сравниваются по месяцам отбора, проверочная часть в выборе не участвует
+        y_pred = data["scaler_Y"].inverse_transform(model.predict(data["X_val"], verbose=0))
+        y_true = data["scaler_Y"].inverse_transform(data["y_val"])
+        result["val_mae"] = float(mean_absolute_error(y_true, y_pred))
+
+        y_pred = data["scaler_Y"].inverse_transform(model.predict(data["X_test"], verbose=0))
+        y_true = data["scaler_Y"].inverse_transform(data["y_test"])
+        metrics = {"mae": float(mean_absolute_error(y_true, y_pred)), "mse": float(mean_squared_error(y_true, y_pred))}
+
+        result.update(metrics)
+        result["epochs_done"] = len(history.history["loss"])
+        if pruning.pruned_epoch is not None:
+            result["status"] = TRIAL_STATUS_PRUNED
+        else:
+            result["status"] = TRIAL_STATUS_DONE
+            meta = {
+                "trained_at": time.strftime("%Y-%m-%d %H:%M:%S"), "metrics": metrics, "hyperparameters": trial,
+                "trained_months": data["trained_months"], "test_months": data["test_months"],
+            }
+            result["artifact"] = artifact_from_model(model, data, meta)
+    except Exception as e:
+        result.update(status=TRIAL_STATUS_FAILED, error=str(e))
+
+    result["seconds"] = time.perf_counter() - started_at
+    return result
+
+
+def run_sweep(train_data_filename:str, trials:list[dict], workers:int=None, threads:int=TRAINING_WORKER_THREADS, on_result=None) -> list[dict]:
+    '''
+    Обучает варианты параллельно и возвращает таблицу результатов
+            Параметры:
+                    train_data_filename(str): файл с данными
+                    trials(list[dict]): варианты из get_sweep_trials
+                    workers(int): количество процессов (None - по числу ядер)
+                    threads(int): количество потоков TensorFlow в каждом процессе
+                    on_result(function): вызывается для каждого завершенного варианта
+            Возвращаемое значение:
+                    leaderboard(list[dict]): варианты, сначала обученные полностью по возрастанию MAE отбора
+    '''
+
+    data = prepare_sweep_data(train_data_filename)
+    results = []
+
+    with multiprocessing.get_context("spawn").Manager() as manager:
+        reports = manager.dict()
+        lock = manager.Lock()
+        with create_worker_pool(min(len(trials), get_workers_count(workers)), threads) as executor:
+            futures = [executor.submit(run_sweep_trial, trial, data, reports, lock) for trial in trials]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+
+    status_order = {TRIAL_STATUS_DONE: 0, TRIAL_STATUS_PRUNED: 1, TRIAL_STATUS_FAILED: 2}
+    return sorted(results, key=lambda result: (status_order[result["status"]], result.get("val_mae", math.inf)))
+
+
+def save_leaderboard(leaderboard:list[dict], path:str) -> None:
+    '''
+    Записывает таблицу результатов в CSV
+            Параметры:
+                    leaderboard(list[dict]): результаты run_sweep
+                    path(str): путь к файлу
+    '''
+
+    fields = ["trial_id", "status", "units", "learning_rate", "batch_size", "epochs", "epochs_done", "val_mae", "mae", "mse", "seconds", "error"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, delimiter=";", extrasaction="ignore")
+        writer.writeheader()
+        for result in leaderboard:
+            writer.writerow({**result, "units": "-".join(map(str, result["units"]))})
+
+
+def register_sweep_result(result:dict, name:str, description:str=DEFAULT_DESCRIPTION) -> str:
+    '''
+    Добавляет обученный вариант в реестр как новую модель
+            Параметры:
+                    result(dict): результат варианта со статусом TRIAL_STATUS_DONE
+                    name(str): имя модели
+                    description(str): описание модели
+            Возвращаемое значение:
+                    model_id(str): id новой модели
+    '''
+
+    restore_integrity()
+    model_id = str(uuid.uuid4())
+    artifact = result["artifact"]
+    add_model_record(model_id, name, description)
+    store_artifact(model_id, artifact)
+    update_model_record(model_id, mae=result["mae"], mse=result["mse"], trained_at=artifact["meta"]["trained_at"])
+    build_forecast_table(model_id)
+    return model_id
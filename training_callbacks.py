@@ -0,0 +1,166 @@
+import keras
+import numpy as np
+import time
+
+from logic import get_checkpoint_path
+from model_artifact import artifact_from_model, write_artifact
+from config import *
+
+class TrainingProgressCallback(keras.callbacks.Callback):
+    '''
+    Сообщает о ходе обучения после каждой эпохи и останавливает обучение по запросу
+            Параметры:
+                    on_epoch_end(function): функция, которая получает номер эпохи, количество эпох,
+                                            потери, прошедшее время и оставшееся время (в секундах)
+                    stop_event(threading.Event): событие, при установке которого обучение прерывается
+    '''
+
+    def __init__(self, on_epoch_end, stop_event=None):
+        super().__init__()
+        self.report = on_epoch_end
+        self.stop_event = stop_event
+        self.stop_reason = None
+        self.started_at = None
+        self.first_epoch = None
+
+    def check_stop(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.model.stop_training = True
+            self.stop_reason = STOP_REASON_CANCELLED
+
+    def on_train_begin(self, logs=None):
+        self.started_at = time.perf_counter()
+        self.first_epoch = None
+        self.check_stop()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        if self.first_epoch is None:
+            self.first_epoch = epoch
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.check_stop()
+
+    def on_epoch_end(self, epoch, logs=None):
+        epochs = self.params.get("epochs", epoch + 1)
+        done = epoch + 1
+        elapsed = time.perf_counter() - self.started_at
+        eta = elapsed / (done - self.first_epoch) * max(0, epochs - done)
+        self.report(done, epochs, float((logs or {}).get("loss", np.nan)), elapsed, eta)
+
+
+class TimeBudgetStopping(keras.callbacks.Callback):
+    '''
+    Останавливает обучение, когда истекает отведенное на него время
+            Параметры:
+                    seconds(float): максимальное время обучения в секундах
+    '''
+
+    def __init__(self, seconds):
+        super().__init__()
+        self.seconds = seconds
+        self.stop_reason = None
+        self.started_at = None
+
+    def on_train_begin(self, logs=None):
+        self.started_at = time.perf_counter()
+        self.stop_reason = None
+
+    def on_train_batch_end(self, batch, logs=None):
+        if time.perf_counter() - self.started_at >= self.seconds:
+            self.model.stop_training = True
+            self.stop_reason = STOP_REASON_TIME_BUDGET
+
+
+class ConvergenceStopping(keras.callbacks.EarlyStopping):
+    '''
+    Останавливает обучение, когда потери на отложенной части обучающих данных (validation_data) перестают уменьшаться,
+    и возвращает веса лучшей эпохи. Проверочные данные для оценки модели сюда не передаются, см. split_validation
+            Параметры:
+                    patience(int): сколько эпох ждать улучшения
+                    min_delta(float): минимальное уменьшение потерь, которое считается улучшением
+    '''
+
+    def __init__(self, patience, min_delta=0.0):
+        super().__init__(monitor="val_loss", patience=patience, min_delta=min_delta, restore_best_weights=True)
+        self.stop_reason = None
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+        self.stop_reason = None
+
+    def on_train_end(self, logs=None):
+        super().on_train_end(logs)
+        if self.stopped_epoch > 0:
+            self.stop_reason = STOP_REASON_CONVERGED
+
+
+class TrainingCheckpoint(keras.callbacks.Callback):
+    '''
+    Сохраняет контрольную точку обучения (модель с состоянием оптимизатора и модели нормализации)
+    каждые every эпох и при досрочной остановке обучения
+            Параметры:
+                    model_id(str): id модели
+                    info(dict): сведения об обучении, которые сохраняются вместе с точкой
+                    scalers(dict): модели нормализации, ключи - scaler_X и scaler_Y
+                    every(int): через сколько эпох сохранять точку
+    '''
+
+    def __init__(self, model_id, info, scalers, every=TRAIN_CHECKPOINT_EVERY):
+        super().__init__()
+        self.model_id = model_id
+        self.info = dict(info)
+        self.loss = list(info.get("loss", []))
+        self.scalers = scalers
+        self.every = every
+        self.saved_epoch = info.get("epoch", 0)
+
+    def save(self, epoch):
+        # Точка пишется одним файлом через переименование, поэтому неполной точки на диске не бывает
+        self.info.update({"epoch": epoch, "loss": self.loss[:epoch]})
+        write_artifact(get_checkpoint_path(self.model_id), artifact_from_model(self.model, self.scalers, {"checkpoint": self.info}))
+        self.saved_epoch = epoch
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.loss.append(float((logs or {}).get("loss", np.nan)))
+        if self.every and (epoch + 1) % self.every == 0:
+            self.save(epoch + 1)
+
+    def on_train_end(self, logs=None):
+        if self.model.stop_training and len(self.loss) > self.saved_epoch:
+            self.save(len(self.loss))
+
+
+class MedianPruning(keras.callbacks.Callback):
+    '''
+    Останавливает вариант подбора гиперпараметров, если его потери на месяцах отбора (validation_data) хуже медианы
+    других вариантов на той же эпохе. Варианты обучаются в разных процессах и делятся потерями через общий словарь
+            Параметры:
+                    reports(dict): общий словарь (multiprocessing.Manager), ключ - эпоха, значение - список потерь
+                    lock(multiprocessing.Lock): блокировка для изменения словаря
+                    every(int): через сколько эпох сравнивать
+                    warmup(int): до какой эпохи не останавливать
+                    min_trials(int): сколько потерь должно быть на эпохе, чтобы по ней останавливать
+    '''
+
+    def __init__(self, reports, lock, every=SWEEP_PRUNE_EVERY, warmup=SWEEP_PRUNE_WARMUP, min_trials=SWEEP_PRUNE_MIN_TRIALS):
+        super().__init__()
+        self.reports = reports
+        self.lock = lock
+        self.every = every
+        self.warmup = warmup
+        self.min_trials = min_trials
+        self.pruned_epoch = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        done = epoch + 1
+        val_loss = (logs or {}).get("val_loss")
+        if val_loss is None or done % self.every:
+            return
+
+        with self.lock:
+            others = self.reports.get(done, [])
+            self.reports[done] = others + [float(val_loss)]
+
+        if done >= self.warmup and len(others) >= self.min_trials and val_loss > np.median(others):
+            self.model.stop_training = True
+            self.pruned_epoch = done
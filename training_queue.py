@@ -0,0 +1,283 @@
+# Очередь обучения: много моделей обучаются одновременно в отдельных процессах.
+# Каждому процессу TensorFlow разрешено ограниченное число потоков, чтобы процессы не делили ядра между собой
+import multiprocessing
+import os
+import queue
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from config import *
+
+# Очередь событий в процессе-исполнителе (задается при запуске процесса)
+_events = None
+
+
+def get_workers_count(workers:int=None) -> int:
+    '''
+    Возвращает количество процессов обучения
+            Параметры:
+                    workers(int): желаемое количество (None - TRAINING_QUEUE_WORKERS или число ядер)
+            Возвращаемое значение:
+                    workers(int): количество процессов
+    '''
+
+    return max(1, workers or TRAINING_QUEUE_WORKERS or os.cpu_count() or 1)
+
+
+def init_training_worker(threads:int, events:'multiprocessing.Queue'=None) -> None:
+    '''
+    Настраивает процесс-исполнитель: ограничивает число потоков TensorFlow до его загрузки
+    и загружает библиотеки, чтобы первое задание не ждало импорта
+            Параметры:
+                    threads(int): количество потоков TensorFlow
+                    events(multiprocessing.Queue): очередь для событий о ходе заданий (может быть None)
+    '''
+
+    global _events
+    _events = events
+
+    for name in ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS", "OMP_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+    from logic import import_ml_stack
+    import_ml_stack()
+
+    import tensorflow as tf
+    tf.get_logger().setLevel("ERROR")
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(threads)
+    except RuntimeError:
+        # TensorFlow уже запущен, остаются ограничения из переменных окружения
+        pass
+
+
+def create_worker_pool(workers:int=None, threads:int=TRAINING_WORKER_THREADS, events:'multiprocessing.Queue'=None) -> ProcessPoolExecutor:
+    '''
+    Создает пул процессов для обучения. Процессы запускаются заново (spawn), а не копируются,
+    потому что TensorFlow и Qt нельзя безопасно копировать в дочерний процесс
+            Параметры:
+                    workers(int): количество процессов
+                    threads(int): количество потоков TensorFlow в каждом процессе
+                    events(multiprocessing.Queue): очередь для событий о ходе заданий
+            Возвращаемое значение:
+                    executor(ProcessPoolExecutor): пул процессов
+    '''
+
+    return ProcessPoolExecutor(
+        max_workers=get_workers_count(workers),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_training_worker,
+        initargs=(threads, events),
+    )
+
+
+def send_event(*event) -> None:
+    if _events is not None:
+        _events.put(event)
+
+
+def run_training_job(job:dict) -> dict:
+    '''
+    Обучает и сохраняет одну модель. Выполняется в процессе-исполнителе
+            Параметры:
+                    job(dict): задание: job_id, model_id, filename, epochs и необязательные resume,
+                               incremental, time_budget, patience, min_delta
+            Возвращаемое значение:
+                    result(dict): состояние, число эпох, MAE, MSE, причина остановки, время в секундах или ошибка
+    '''
+
+    from logic import train_model, save_trained_model, delete_checkpoint, get_stop_callbacks, get_stop_reason, get_model_type
+    from training_callbacks import TrainingProgressCallback
+
+    job_id = job["job_id"]
+    started_at = time.perf_counter()
+    send_event("started", job_id, os.getpid())
+
+    try:
+        # Гармоническая модель решается без эпох, обратные вызовы Keras ей не нужны
+        if get_model_type(job["model_id"]) == MODEL_TYPE_HARMONIC:
+            callbacks = []
+        else:
+            callbacks = [TrainingProgressCallback(
+                lambda epoch, epochs, loss, elapsed, eta: send_event("epoch", job_id, epoch, epochs, loss, eta)
+            )]
+            callbacks += get_stop_callbacks(job.get("time_budget"), job.get("patience"), job.get("min_delta", 0.0))
+
+        history, model, evaluate_res, scalers = train_model(
+            job["model_id"], job["filename"], job["epochs"], verbose=0, callbacks=callbacks, resume=job.get("resume", False),
+            incremental=job.get("incremental", False)
+        )
+        save_trained_model(job["model_id"], model, scalers, evaluate_res, job["filename"])
+        delete_checkpoint(job["model_id"])
+    except Exception as e:
+        return {"status": JOB_STATUS_FAILED, "error": str(e), "seconds": time.perf_counter() - started_at}
+
+    return {
+        "status": JOB_STATUS_DONE,
+        "epoch": len(history.history["loss"]),
+        "mae": evaluate_res["mae"],
+        "mse": evaluate_res["mse"],
+        "stop_reason": get_stop_reason(callbacks),
+        "seconds": time.perf_counter() - started_at,
+    }
+
+
+class TrainingQueue:
+    '''
+    Очередь заданий обучения. Задания выполняются в пуле процессов, состояние каждого
+    задания обновляется по событиям от процессов-исполнителей
+            Параметры:
+                    workers(int): количество процессов (None - по числу ядер)
+                    threads(int): количество потоков TensorFlow в каждом процессе
+    '''
+
+    def __init__(self, workers:int=None, threads:int=TRAINING_WORKER_THREADS):
+        self.workers = get_workers_count(workers)
+        self.threads = threads
+        self.jobs = []
+        self.futures = {}
+        self.events = multiprocessing.get_context("spawn").Queue()
+        self.executor = None
+        self.started_at = None
+
+    def submit(self, model_id:str, filename:str, epochs:int, **options) -> int:
+        '''
+        Добавляет задание в очередь. Если очередь уже запущена, задание сразу уходит исполнителям
+                Параметры:
+                        model_id(str): id модели
+                        filename(str): файл с данными
+                        epochs(int): количество эпох
+                        options: resume, incremental, time_budget, patience, min_delta
+                Возвращаемое значение:
+                        job_id(int): номер задания
+        '''
+
+        if any(job["model_id"] == model_id and job["status"] in (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING) for job in self.jobs):
+            raise ValueError(f"Модель {model_id} уже стоит в очереди обучения")
+
+        job = {
+            "job_id": len(self.jobs), "model_id": model_id, "filename": filename, "epochs": epochs, "options": options,
+            "status": JOB_STATUS_QUEUED, "epoch": 0, "loss": None, "eta": None, "mae": None, "mse": None,
+            "stop_reason": None, "error": None, "seconds": None, "pid": None,
+        }
+        self.jobs.append(job)
+        if self.executor is not None:
+            self.dispatch(job)
+        return job["job_id"]
+
+    def dispatch(self, job:dict) -> None:
+        params = {"job_id": job["job_id"], "model_id": job["model_id"], "filename": job["filename"], "epochs": job["epochs"]}
+        self.futures[job["job_id"]] = self.executor.submit(run_training_job, {**params, **job["options"]})
+
+    def start(self) -> None:
+        '''
+        Запускает процессы и отдает им задания. Файлы с данными разбираются заранее в этом процессе,
+        чтобы исполнители брали готовые данные из кэша, а не разбирали один файл одновременно
+        '''
+
+        from logic import get_monthly_temperatures
+
+        self.started_at = time.perf_counter()
+        errors = {}
+        for filename in dict.fromkeys(job["filename"] for job in self.jobs):
+            try:
+                get_monthly_temperatures(filename)
+            except Exception as e:
+                errors[filename] = str(e)
+
+        for job in self.jobs:
+            if job["filename"] in errors:
+                job.update(status=JOB_STATUS_FAILED, error=errors[job["filename"]])
+
+        self.executor = create_worker_pool(self.workers, self.threads, self.events)
+        for job in self.jobs:
+            if job["status"] == JOB_STATUS_QUEUED:
+                self.dispatch(job)
+
+    def poll(self) -> list[dict]:
+        '''
+        Обрабатывает накопившиеся события и завершенные задания
+                Возвращаемое значение:
+                        changed(list[dict]): задания, у которых сменилось состояние
+        '''
+
+        changed = []
+        for job_id, future in list(self.futures.items()):
+            if not future.done():
+                continue
+            del self.futures[job_id]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Процесс-исполнитель упал, не вернув результат
+                result = {"status": JOB_STATUS_FAILED, "error": str(e)}
+            self.jobs[job_id].update(result)
+            changed.append(self.jobs[job_id])
+
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+            job = self.jobs[event[1]]
+            # Событие о начале могло прийти позже результата, если задание завершилось сразу
+            if event[0] == "started" and job["status"] == JOB_STATUS_QUEUED:
+                job.update(status=JOB_STATUS_RUNNING, pid=event[2])
+                changed.append(job)
+            elif event[0] == "epoch":
+                job.update(epoch=event[2], loss=event[4], eta=event[5])
+
+        return changed
+
+    def is_finished(self) -> bool:
+        return all(job["status"] in (JOB_STATUS_DONE, JOB_STATUS_FAILED) for job in self.jobs)
+
+    def wait(self, on_change=None) -> list[dict]:
+        '''
+        Ждет окончания всех заданий
+                Параметры:
+                        on_change(function): вызывается для каждого задания, у которого сменилось состояние
+                Возвращаемое значение:
+                        jobs(list[dict]): все задания
+        '''
+
+        if self.executor is None:
+            self.start()
+            # Задания, которые не удалось начать из-за файла с данными, тоже показываем
+            for job in self.jobs:
+                if job["status"] == JOB_STATUS_FAILED and on_change is not None:
+                    on_change(job)
+
+        while True:
+            for job in self.poll():
+                if on_change is not None:
+                    on_change(job)
+            if self.is_finished():
+                return self.jobs
+            time.sleep(TRAINING_QUEUE_POLL_INTERVAL)
+
+    def get_summary(self) -> dict:
+        '''
+        Возвращает сводку по очереди
+                Возвращаемое значение:
+                        summary(dict): число заданий по состояниям, время работы и заданий в минуту
+        '''
+
+        elapsed = 0.0 if self.started_at is None else time.perf_counter() - self.started_at
+        summary = {status: 0 for status in (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, JOB_STATUS_DONE, JOB_STATUS_FAILED)}
+        for job in self.jobs:
+            summary[job["status"]] += 1
+        summary["elapsed"] = elapsed
+        summary["jobs_per_minute"] = summary[JOB_STATUS_DONE] / elapsed * 60 if elapsed else 0.0
+        return summary
+
+    def close(self) -> None:
+        '''Останавливает процессы, задания в очереди отменяются'''
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
@@ -1,8 +1,7 @@
 
-import os
-import uuid
-import joblib
+import time
 import datetime
+import threading
 import numpy as np
 from matplotlib.figure import Figure
 from matplotlib.ticker import MaxNLocator
@@ -11,11 +10,11 @@ from matplotlib.backends.backend_qt5agg import FigureCanvas
 from PyQt5.QtWidgets import (
     QFrame, QLabel, QPushButton, QTabWidget, QVBoxLayout, QHBoxLayout, 
     QMainWindow, QStyle, QTabBar, QRadioButton, QStyleOptionTab, 
-    QLineEdit, QWidget, QFileDialog, QSizePolicy, QGridLayout, 
-    QScrollArea, QTextEdit, QDialog, QButtonGroup,
+    QLineEdit, QWidget, QFileDialog, QSizePolicy, 
+    QScrollArea, QTextEdit, QDialog, QButtonGroup, QCheckBox, QMessageBox,
 )
 from PyQt5.QtGui import QIcon, QPixmap, QFontMetrics
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QObject, QTimer, pyqtSignal
 
 from logic import *
 from config import *
@@ -33,28 +32,29 @@ def apply_theme(self, theme_key:str) -> None:
 
 
 class ModelCard(QFrame):
-    '''Карточка модели в разделе "Модели"'''
+    '''
+    Карточка модели в разделе "Модели". Каталог переиспользует карточки при прокрутке,
+    поэтому модель привязывается к карточке методом bind, а кнопки берут текущий id при нажатии
+    '''
 
     def __init__(self, model_id, model_data, parent):
         super().__init__()
         self.setObjectName("modelCard")
         self.setFrameShape(QFrame.StyledPanel)
         self.setAttribute(Qt.WA_StyledBackground, True)
-        self.model_id = model_id
-        self.model_data = model_data
+        self.model_id = None
+        self.model_data = None
         self.parent = parent
         self.init_ui()
+        self.bind(model_id, model_data)
 
     def init_ui(self):
-        if self.layout() is not None:
-            QWidget().setLayout(self.layout())
-
         self.setFixedSize(MODEL_CARD_WIDTH, MODEL_CARD_HEIGHT)
         layout = QVBoxLayout(self)
 
         # Имя модели
         header_layout = QHBoxLayout()
-        self.name_label = QLabel(self.model_data["name"])
+        self.name_label = QLabel()
         self.name_label.setObjectName("modelNameLabel")
         self.name_label.setWordWrap(True)
         header_layout.addWidget(self.name_label)  
@@ -62,28 +62,22 @@ class ModelCard(QFrame):
         # Добавляем растягивающийся элемент между именем и иконкой
         header_layout.addStretch(1)  
 
-        # Добавляем иконки только для нестандартных моделей
+        # Изменить имя или описание
+        self.change_name_button = HoverButton(CHANGE_ICON_PATH, CHANGE_ICON_HOVER_PATH)
+        self.change_name_button.setObjectName("changeNameButton")
+        self.change_name_button.clicked.connect(lambda: self.parent.get_command_change_name(self.model_id)())
+        header_layout.addWidget(self.change_name_button)  
 
-        if self.model_id != STANDARD_MODEL_ID:
-
-            # Изменить имя или описание
-            change_name_button = HoverButton(CHANGE_ICON_PATH, CHANGE_ICON_HOVER_PATH)
-            change_name_button.setObjectName("changeNameButton")
-            change_name_button.setIcon(QIcon(CHANGE_ICON_PATH))
-            change_name_button.clicked.connect(self.parent.get_command_change_name(self.model_id))
-            header_layout.addWidget(change_name_button)  
-
-            # Удалить модель
-            delete_button = HoverButton(TRASH_ICON_PATH, TRASH_ICON_HOVER_PATH)
-            delete_button.setObjectName("deleteIconButton")
-            delete_button.setIcon(QIcon(TRASH_ICON_PATH))
-            delete_button.clicked.connect(self.parent.get_command_delete_button(self.model_id))
-            header_layout.addWidget(delete_button)
+        # Удалить модель
+        self.delete_button = HoverButton(TRASH_ICON_PATH, TRASH_ICON_HOVER_PATH)
+        self.delete_button.setObjectName("deleteIconButton")
+        self.delete_button.clicked.connect(lambda: self.parent.get_command_delete_button(self.model_id)())
+        header_layout.addWidget(self.delete_button)
 
         layout.addLayout(header_layout)
 
         # Описание модели
-        self.desc_label = QLabel(self.model_data.get("description", DEFAULT_DESCRIPTION))
+        self.desc_label = QLabel()
         self.desc_label.setObjectName("modelDescLabel")
         self.desc_label.setWordWrap(True)
         self.desc_label.setMaximumHeight(50)
@@ -95,17 +89,214 @@ class ModelCard(QFrame):
         # Кнопка "Обучить модель"
         train_button = QPushButton(TRAIN_BUTTON_TEXT)
         train_button.setObjectName("trainModelButton")
-        train_button.clicked.connect(self.parent.get_command_train_button(self.model_id))
+        train_button.clicked.connect(lambda: self.parent.get_command_train_button(self.model_id)())
         buttons_layout.addWidget(train_button)
 
         # Кнопка "Предсказать"
         predict_button = QPushButton(PREDICT_BUTTON_TEXT)
         predict_button.setObjectName("predictModelButton")
-        predict_button.clicked.connect(self.parent.get_command_predict(self.model_id))
+        predict_button.clicked.connect(lambda: self.parent.get_command_predict(self.model_id)())
         buttons_layout.addWidget(predict_button)
 
         layout.addLayout(buttons_layout)
 
+    def bind(self, model_id, model_data):
+        '''Показывает на карточке другую модель или новые имя и описание той же модели'''
+
+        self.model_id = model_id
+        self.model_data = model_data
+        self.name_label.setText(model_data["name"])
+        self.desc_label.setText(model_data.get("description", DEFAULT_DESCRIPTION))
+
+        # Стандартную модель нельзя переименовать или удалить
+        is_custom = model_id != STANDARD_MODEL_ID
+        self.change_name_button.setVisible(is_custom)
+        self.delete_button.setVisible(is_custom)
+
+
+class ModelCatalog(QScrollArea):
+    '''
+    Каталог карточек моделей с поиском. Карточки создаются только для видимых строк
+    и переиспользуются при прокрутке, число колонок зависит от ширины
+    '''
+
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+        self.models = {}
+        self.index = []
+        self.query = ""
+        self.model_ids = []
+        self.cards = []
+        self.num_cols = 1
+
+        self.cards_widget = QWidget()
+        self.cards_widget.setObjectName("cardsWidget")
+        self.setWidget(self.cards_widget)
+        self.setWidgetResizable(True)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.verticalScrollBar().valueChanged.connect(self.update_visible_cards)
+
+    def set_models(self, models):
+        '''Перестраивает индекс поиска по новому списку моделей'''
+
+        self.models = models
+        self.index = build_models_index(models)
+
+        # Карточки удаленных моделей освобождаем, у остальных обновляем подписи
+        for card in self.cards:
+            if card.model_id not in models:
+                card.model_id = None
+                card.hide()
+            elif card.model_data is not models[card.model_id] or card.name_label.text() != models[card.model_id]["name"] \
+                    or card.desc_label.text() != models[card.model_id]["description"]:
+                card.bind(card.model_id, models[card.model_id])
+
+        self.set_query(self.query)
+
+    def set_query(self, query):
+        '''Оставляет в каталоге модели, подходящие под запрос'''
+
+        self.query = query
+        self.model_ids = search_models(self.index, query)
+        self.update_layout()
+
+    def update_layout(self):
+        '''Пересчитывает число колонок и высоту каталога'''
+
+        width = self.viewport().width()
+        self.num_cols = max(1, (width - MODEL_CARDS_SPACING) // (MODEL_CARD_WIDTH + MODEL_CARDS_SPACING))
+        num_rows = (len(self.model_ids) + self.num_cols - 1) // self.num_cols
+        self.cards_widget.setMinimumHeight(MODEL_CARDS_SPACING + num_rows * (MODEL_CARD_HEIGHT + MODEL_CARDS_SPACING))
+        self.update_visible_cards()
+
+    def update_visible_cards(self):
+        '''Раскладывает карточки по видимым строкам, лишние карточки прячет'''
+
+        row_height = MODEL_CARD_HEIGHT + MODEL_CARDS_SPACING
+        top = self.verticalScrollBar().value()
+        first_row = max(0, (top - MODEL_CARDS_SPACING) // row_height)
+        last_row = (top + self.viewport().height()) // row_height
+        first = first_row * self.num_cols
+        visible_ids = self.model_ids[first:(last_row + 1) * self.num_cols]
+
+        # Карточки, которые уже показывают видимые модели, остаются на своих моделях
+        visible_set = set(visible_ids)
+        bound_cards = {card.model_id: card for card in self.cards if card.model_id in visible_set}
+        free_cards = [card for card in self.cards if card.model_id not in visible_set]
+
+        grid_width = self.num_cols * (MODEL_CARD_WIDTH + MODEL_CARDS_SPACING) - MODEL_CARDS_SPACING
+        left = max(MODEL_CARDS_SPACING, (self.viewport().width() - grid_width) // 2)
+
+        for position, model_id in enumerate(visible_ids, start=first):
+            card = bound_cards.get(model_id)
+            if card is None:
+                if free_cards:
+                    card = free_cards.pop()
+                    card.bind(model_id, self.models[model_id])
+                else:
+                    card = ModelCard(model_id, self.models[model_id], self.parent)
+                    card.setParent(self.cards_widget)
+                    self.cards.append(card)
+
+            row, col = divmod(position, self.num_cols)
+            card.move(left + col * (MODEL_CARD_WIDTH + MODEL_CARDS_SPACING), MODEL_CARDS_SPACING + row * row_height)
+            card.show()
+
+        for card in free_cards:
+            card.hide()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_layout()
+
+
+class ForecastWorker(QObject):
+    '''Считает прогноз для боковой панели в фоновом потоке'''
+
+    forecast_ready = pyqtSignal(int, object)
+
+    def __init__(self, month):
+        super().__init__()
+        self.month = month
+
+    def run(self):
+        try:
+            temperature = predict_weather_summary(self.month)
+        except Exception as e:
+            print(f"Не удалось посчитать прогноз для боковой панели: {e}")
+            temperature = None
+        self.forecast_ready.emit(self.month, temperature)
+
+        # Прогноз берется из таблицы без Keras, поэтому библиотеки загружаются уже после него,
+        # чтобы первое обучение не ждало импорта
+        import_ml_stack()
+
+
+class TrainingWorker(QObject):
+    '''Обучает модель в фоновом потоке и сообщает о ходе обучения через сигналы'''
+
+    epoch_finished = pyqtSignal(int, int, float, float, float)
+    training_finished = pyqtSignal(object)
+    training_cancelled = pyqtSignal(object)
+    training_failed = pyqtSignal(str)
+
+    def __init__(self, model_id, filename, epochs, resume=False, stop_options=None, incremental=False):
+        super().__init__()
+        self.model_id = model_id
+        self.filename = filename
+        self.epochs = epochs
+        self.resume = resume
+        self.incremental = incremental
+        self.stop_options = stop_options or {}
+        # Дообучение и гармоническая модель контрольных точек не пишут, поэтому при отмене сравниваем точку с прежней
+        self.previous_checkpoint = get_checkpoint(model_id)
+        self.previous_loss = self.previous_checkpoint["loss"] if resume else []
+        self.stop_event = threading.Event()
+
+    def cancel(self):
+        '''Просит остановить обучение после текущего шага'''
+
+        self.stop_event.set()
+
+    def run(self):
+        try:
+            # Гармоническая модель решается без эпох, Keras и его обратные вызовы ей не нужны
+            if get_model_type(self.model_id) == MODEL_TYPE_HARMONIC:
+                callbacks = []
+            else:
+                import_ml_stack()
+                from training_callbacks import TrainingProgressCallback
+
+                callbacks = [TrainingProgressCallback(self.epoch_finished.emit, self.stop_event)]
+                callbacks += get_stop_callbacks(**self.stop_options)
+
+            history, model, evaluate_res, scalers = train_model(
+                self.model_id, self.filename, self.epochs, verbose=0, resume=self.resume, callbacks=callbacks,
+                incremental=self.incremental
+            )
+            result = {
+                "loss": self.previous_loss + history.history["loss"],
+                "mae": evaluate_res["mae"],
+                "mse": evaluate_res["mse"],
+                "stop_reason": get_stop_reason(callbacks),
+            }
+
+            # При отмене обученная модель не сохраняется, прогресс остается в контрольной точке, если она записалась
+            if self.stop_event.is_set():
+                result["checkpoint_saved"] = get_checkpoint(self.model_id) not in (None, self.previous_checkpoint)
+                self.training_cancelled.emit(result)
+                return
+
+            save_trained_model(self.model_id, model, scalers, evaluate_res, self.filename)
+            delete_checkpoint(self.model_id)
+        except Exception as e:
+            print(f"Ошибка обучения модели {self.model_id}: {e}")
+            self.training_failed.emit(str(e))
+            return
+
+        self.training_finished.emit(result)
+
 
 class ModelTab(QWidget):
     '''Вкладка модели'''
@@ -115,15 +306,36 @@ class ModelTab(QWidget):
         self.model_id = model_id
         self.model_data = model_data
         self.parent = parent
+        # Графики создаются один раз и переживают пересборку вкладки, меняются только данные
+        self.loss_canvas = None
+        self.prediction_panel = None
+        self.predict_year = None
+        self.progress_label = None
         self.init_params(is_training)
 
     def init_params(self, is_training=None):
         self.is_training = is_training
         self.is_prediction = not is_training
-        if is_training:
-            self.training_data = {"epochs": [], "loss":[], "mae": -1, "mse": -1}
+        # Во время фонового обучения данные графика не сбрасываем
+        if is_training and not self.is_training_running():
+            self.training_data = {
+                "epochs": [], "loss":[], "mae": -1, "mse": -1,
+                "error": None, "cancelled": False, "checkpoint_saved": False, "stop_reason": None
+            }
+
+    def is_training_running(self):
+        '''Проверяет, идет ли сейчас обучение этой модели'''
+
+        return self.model_id in self.parent.training_threads
 
     def init_ui(self, predict_year:int=None):
+        self.progress_label = None
+
+        # Графики отцепляем от старых контейнеров, чтобы они не удалились вместе с ними
+        for widget in (self.loss_canvas, self.prediction_panel):
+            if widget is not None:
+                widget.setParent(None)
+
         # Очистка предыдущего layout
         if self.layout() is not None:
             while self.layout().count():
@@ -168,6 +380,15 @@ class ModelTab(QWidget):
     def show_training_results(self, layout):
         '''Показывает график обучения (x - эпоха, y - потери)'''
 
+        if self.training_data["error"] is not None:
+            error_label = QLabel(TRAIN_FAILED_LABEL_TEXT.format(self.training_data["error"]))
+            error_label.setObjectName("errorLabel")
+            error_label.setWordWrap(True)
+            layout.addWidget(error_label, alignment=Qt.AlignCenter)
+            return
+
+        is_running = self.is_training_running()
+
         content_widget = QWidget()
         content_layout = QHBoxLayout(content_widget)
         
@@ -175,76 +396,175 @@ class ModelTab(QWidget):
         
         content_layout.addWidget(loss_container)
 
-        train_done_label = QLabel(TRAIN_DONE_LABEL_TEXT)
+        if is_running:
+            train_done_label = QLabel(TRAIN_WAITING_LABEL_TEXT)
+        elif self.training_data["cancelled"] and self.training_data["checkpoint_saved"]:
+            train_done_label = QLabel(TRAIN_CANCELLED_LABEL_TEXT.format(len(self.training_data["loss"])))
+        elif self.training_data["cancelled"]:
+            train_done_label = QLabel(TRAIN_CANCELLED_NOT_SAVED_LABEL_TEXT.format(len(self.training_data["loss"])))
+        else:
+            train_done_label = QLabel(TRAIN_DONE_LABEL_TEXT)
         train_done_label.setObjectName("trainDoneLabel")
         layout.addWidget(train_done_label)
 
-        fig = Figure(dpi=100, facecolor="none")
-        ax = fig.add_subplot(111, facecolor="none")
-        
-        ax.plot(self.training_data["epochs"], self.training_data["loss"], color=WHITE_COLOR_DIAGRAMS)
-        ax.set_xlabel("График потерь", color=WHITE_COLOR_DIAGRAMS) 
-        ax.tick_params(axis="x", rotation=45, colors=WHITE_COLOR_DIAGRAMS)
-        ax.tick_params(axis="y", colors=WHITE_COLOR_DIAGRAMS)
-        ax.yaxis.set_major_locator(MaxNLocator(nbins=10))
-        
-        fig.subplots_adjust(left=0.15, bottom=0.3, right=0.95, top=1)
-        
-        for spine in ax.spines.values():
-            spine.set_color(WHITE_COLOR_DIAGRAMS)
-        
-        canvas = FigureCanvas(fig)
+        if is_running:
+            self.progress_label = QLabel("")
+            self.progress_label.setObjectName("trainProgressLabel")
+            layout.addWidget(self.progress_label)
+
+        canvas = self.get_loss_canvas()
         canvas.setMinimumHeight(loss_container.sizeHint().height())
-        canvas.setStyleSheet("background-color: transparent;")
-        
+        self.update_loss_plot()
+
         content_layout.addWidget(canvas)
         content_layout.addStretch()
 
         layout.addWidget(content_widget)
 
+        if is_running:
+            self.cancel_training_button = QPushButton(CANCEL_TRAIN_BUTTON_TEXT)
+            self.cancel_training_button.setObjectName("cancelTrainButton")
+            self.cancel_training_button.clicked.connect(self.cancel_training)
+            layout.addWidget(self.cancel_training_button)
+
+        # Оценка и сохранение доступны только после окончания обучения
+        if is_running or self.training_data["cancelled"]:
+            return
+
         mean_errors_label = QLabel(EVALUATE_RESULT_TEXT.format(self.training_data["mae"], self.training_data["mse"]))
         mean_errors_label.setObjectName("meanErrorsLabel")
         layout.addWidget(mean_errors_label)
 
         mean_errors_label.setMargin(10)
 
+        if self.training_data["stop_reason"]:
+            stop_reason_label = QLabel(STOP_REASON_LABEL_TEXT.format(self.training_data["stop_reason"]))
+            stop_reason_label.setObjectName("meanErrorsLabel")
+            stop_reason_label.setMargin(10)
+            layout.addWidget(stop_reason_label)
+
         save_training_button = QPushButton(SAVE_BUTTON_TEXT)
         save_training_button.setObjectName("SaveTrainingDataButton")
 
         save_training_button.clicked.connect(self.parent.get_command_save_button(self.model_id))
         layout.addWidget(save_training_button)
 
-    def start_training(self, filename, epochs):
-        '''Запускает процесс обучения модели'''
+    def get_loss_canvas(self) -> FigureCanvas:
+        '''Возвращает холст графика потерь. Фигура создается при первом обращении'''
 
-        history, model, evaluate_res, scalers = train_model(self.model_id, filename, epochs, verbose=1)
+        if self.loss_canvas is not None:
+            return self.loss_canvas
 
-        self.training_data["loss"] = history.history["loss"]
-        self.training_data["epochs"] = [i for i in range(1, epochs+1)] 
-        self.training_data["mae"], self.training_data["mse"] = evaluate_res["mae"], evaluate_res["mse"]
+        fig = Figure(dpi=100, facecolor="none")
+        ax = fig.add_subplot(111, facecolor="none")
+        
+        self.loss_line, = ax.plot([], [], color=WHITE_COLOR_DIAGRAMS)
+        self.loss_axes = ax
+        ax.set_xlabel("График потерь", color=WHITE_COLOR_DIAGRAMS) 
+        ax.tick_params(axis="x", rotation=45, colors=WHITE_COLOR_DIAGRAMS)
+        ax.tick_params(axis="y", colors=WHITE_COLOR_DIAGRAMS)
+        ax.yaxis.set_major_locator(MaxNLocator(nbins=10))
+        
+        fig.subplots_adjust(left=0.15, bottom=0.3, right=0.95, top=1)
+        
+        for spine in ax.spines.values():
+            spine.set_color(WHITE_COLOR_DIAGRAMS)
+        
+        self.loss_canvas = FigureCanvas(fig)
+        self.loss_canvas.setStyleSheet("background-color: transparent;")
+        return self.loss_canvas
 
-        model_path = os.path.join(MODELS_DIRECTORY_PATH, self.model_id + ".keras")
-        scaler_X_path = os.path.join(MODELS_DIRECTORY_PATH, "scaler_X" + self.model_id + ".keras")
-        scaler_Y_path = os.path.join(MODELS_DIRECTORY_PATH, "scaler_Y" + self.model_id + ".keras")
+    def update_loss_plot(self):
+        '''Перерисовывает линию потерь по текущим данным обучения'''
+
+        self.loss_line.set_data(self.training_data["epochs"], self.training_data["loss"])
+        self.loss_axes.relim()
+        self.loss_axes.autoscale_view()
+        self.loss_canvas.draw_idle()
+
+    def start_training(self, filename, epochs, resume=False, stop_options=None, incremental=False):
+        '''Запускает процесс обучения модели в фоновом потоке'''
+
+        worker = TrainingWorker(self.model_id, filename, epochs, resume, stop_options, incremental)
+        worker.epoch_finished.connect(self.on_epoch_finished)
+        worker.training_finished.connect(self.on_training_finished)
+        worker.training_cancelled.connect(self.on_training_cancelled)
+        worker.training_failed.connect(self.on_training_failed)
+
+        # При продолжении обучения график начинается с уже пройденных эпох
+        self.training_data["loss"] = list(worker.previous_loss)
+        self.training_data["epochs"] = [i for i in range(1, len(worker.previous_loss) + 1)]
+
+        # Поток-демон не мешает закрыть приложение во время обучения
+        thread = threading.Thread(target=worker.run, daemon=True)
+        self.parent.training_threads[self.model_id] = {"thread": thread, "worker": worker, "tab": self}
 
-        if os.path.exists(model_path):
-            os.remove(model_path)
-        model.save(model_path)
-        joblib.dump(scalers["scaler_X"], scaler_X_path)
-        joblib.dump(scalers["scaler_Y"], scaler_Y_path)
-        
         self.init_ui()
+        thread.start()
+
+    def cancel_training(self):
+        '''Останавливает фоновое обучение модели'''
+
+        if self.is_training_running():
+            self.parent.training_threads[self.model_id]["worker"].cancel()
+            self.cancel_training_button.setEnabled(False)
+
+    def on_epoch_finished(self, epoch, epochs, loss, elapsed, eta):
+        '''Дорисовывает график потерь после очередной эпохи'''
+
+        self.training_data["epochs"].append(epoch)
+        self.training_data["loss"].append(loss)
+
+        if not self.is_training or self.progress_label is None:
+            return
+
+        self.update_loss_plot()
+        self.progress_label.setText(TRAIN_PROGRESS_LABEL_TEXT.format(epoch, epochs, loss, elapsed, eta))
+
+    def on_training_finished(self, result):
+        '''Показывает результаты после окончания обучения'''
+
+        self.parent.training_threads.pop(self.model_id, None)
+
+        self.training_data["loss"] = result["loss"]
+        self.training_data["epochs"] = [i for i in range(1, len(result["loss"]) + 1)]
+        self.training_data["mae"], self.training_data["mse"] = result["mae"], result["mse"]
+        self.training_data["stop_reason"] = result["stop_reason"]
+
+        # Метрики в каталоге обновляем из реестра, чтобы по ним работал поиск
+        record = get_model_record(self.model_id)
+        if record is not None and self.model_id in self.parent.models:
+            self.parent.models[self.model_id].update(record)
+            self.parent.draw_models_cards()
+
+        if self.is_training:
+            self.init_ui()
+
+    def on_training_cancelled(self, result):
+        '''Показывает, на какой эпохе остановлено обучение'''
+
+        self.parent.training_threads.pop(self.model_id, None)
+
+        self.training_data["loss"] = result["loss"]
+        self.training_data["epochs"] = [i for i in range(1, len(result["loss"]) + 1)]
+        self.training_data["cancelled"] = True
+        self.training_data["checkpoint_saved"] = result["checkpoint_saved"]
+
+        if self.is_training:
+            self.init_ui()
+
+    def on_training_failed(self, error):
+        '''Показывает ошибку обучения'''
+
+        self.parent.training_threads.pop(self.model_id, None)
+        self.training_data["error"] = error
+
+        if self.is_training:
+            self.init_ui()
 
     def show_prediction_results(self, layout, predict_year:int):
         '''Показывает результаты предсказания температуры'''
 
-        model, scaler_X, scaler_Y = get_model(self.model_id)
-        if model is None:
-            error_label = QLabel(ERROR_LABEL_TEXT)
-            error_label.setObjectName("errorLabel")
-            layout.addWidget(error_label, alignment=Qt.AlignCenter)
-            return
-        
         if predict_year == -1:
             # [?] Выделить в отдельную функцию
             for i in range(self.parent.tab_view.count()):
@@ -257,23 +577,37 @@ class ModelTab(QWidget):
             
             return
 
-        test_years = [predict_year] * 12
-        test_months = list(range(1, 13))
-        test_input = np.column_stack((test_years, test_months))
-        test_input_scaled = test_input if scaler_X is None else scaler_X.transform(test_input)
-        test_input_scaled = np.array(test_input_scaled, dtype=np.float32)
-
-        predicted_temperature_scaled = model.predict(test_input_scaled, verbose=0)
-        predicted_temperature = (
-            predicted_temperature_scaled.reshape(12)
-            if scaler_Y is None
-            else scaler_Y.inverse_transform(predicted_temperature_scaled).reshape(12)
-        )
+        # При пересборке вкладки (например, после переименования) показываем последний выбранный год
+        if predict_year is None:
+            predict_year = self.predict_year
+
+        predicted_temperature = None if predict_year is None else get_forecast(self.model_id, int(predict_year))
+        if predicted_temperature is None:
+            error_label = QLabel(ERROR_LABEL_TEXT)
+            error_label.setObjectName("errorLabel")
+            layout.addWidget(error_label, alignment=Qt.AlignCenter)
+            return
+
+        self.predict_year = int(predict_year)
+        self.predicted_temperature = predicted_temperature
+
+        layout.addWidget(self.get_prediction_panel())
+        self.update_prediction_panel()
+
+    def get_prediction_panel(self) -> QWidget:
+        '''Возвращает панель с результатами предсказания. Виджеты и фигура создаются при первом обращении'''
+
+        if self.prediction_panel is not None:
+            return self.prediction_panel
+
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        layout.setContentsMargins(0, 0, 0, 0)
 
-        predict_subtitle = QLabel(PREDICT_WINDOW_SUBTITLE_TEMPLATE.format(predict_year))
-        predict_subtitle.setStyleSheet("font-size: 14px; padding: 5px; font-weight: 500;")
-        predict_subtitle.setAlignment(Qt.AlignHCenter)
-        layout.addWidget(predict_subtitle)
+        self.predict_subtitle = QLabel()
+        self.predict_subtitle.setStyleSheet("font-size: 14px; padding: 5px; font-weight: 500;")
+        self.predict_subtitle.setAlignment(Qt.AlignHCenter)
+        layout.addWidget(self.predict_subtitle)
 
         content_widget = QWidget()
         content_layout = QHBoxLayout(content_widget)
@@ -282,11 +616,13 @@ class ModelTab(QWidget):
         temp_layout = QVBoxLayout(temp_container)
         temp_layout.setSpacing(5) 
         
-        for month, temp in zip(MONTHS_NAME, predicted_temperature):
-            month_label = QLabel(f"{month}: {temp:.1f}°C")
+        self.month_labels = []
+        for month in MONTHS_NAME:
+            month_label = QLabel(f"{month}:")
             month_label.setObjectName("monthLabel")
             month_label.setFixedHeight(20) 
             temp_layout.addWidget(month_label)
+            self.month_labels.append(month_label)
         
         temp_layout.addStretch()
         content_layout.addWidget(temp_container)
@@ -294,7 +630,8 @@ class ModelTab(QWidget):
         fig = Figure(figsize=(6, 4), dpi=100, facecolor="none")
         ax = fig.add_subplot(111, facecolor="none")
         
-        ax.bar(MONTHS_NAME, predicted_temperature, color=WHITE_COLOR_DIAGRAMS, width=0.6)
+        self.predict_bars = ax.bar(MONTHS_NAME, np.zeros(len(MONTHS_NAME)), color=WHITE_COLOR_DIAGRAMS, width=0.6)
+        self.predict_axes = ax
         ax.set_ylabel(PREDICTED_TEMPERATURE_YLABEL, color=WHITE_COLOR_DIAGRAMS) 
         ax.tick_params(axis="x", rotation=45, colors=WHITE_COLOR_DIAGRAMS)
         ax.tick_params(axis="y", colors=WHITE_COLOR_DIAGRAMS)
@@ -305,33 +642,50 @@ class ModelTab(QWidget):
         for spine in ax.spines.values():
             spine.set_color(WHITE_COLOR_DIAGRAMS)
         
-        canvas = FigureCanvas(fig)
-        canvas.setMinimumHeight(temp_container.sizeHint().height())
-        canvas.setStyleSheet("background-color: transparent;")
+        self.predict_canvas = FigureCanvas(fig)
+        self.predict_canvas.setMinimumHeight(temp_container.sizeHint().height())
+        self.predict_canvas.setStyleSheet("background-color: transparent;")
         
-        content_layout.addWidget(canvas)
+        content_layout.addWidget(self.predict_canvas)
 
         layout.addWidget(content_widget)
 
         save_result_button = QPushButton(SAVE_RESULT_BUTTON)
         save_result_button.setObjectName("save_result_button")
+        save_result_button.clicked.connect(self.save_prediction_result)
+        layout.addWidget(save_result_button)
 
-        def save_result():
-            path, _ = QFileDialog.getSaveFileName(None, SAVE_RESULT_WINDOW_TITLE, ".", "Txt/Csv (*.txt, *.csv)")
+        self.prediction_panel = panel
+        return panel
 
-            if path:
-                if (not str.endswith(path, ".txt")) and (not str.endswith(path, ".csv")):
-                    new_filename += ".txt"
+    def update_prediction_panel(self):
+        '''Меняет подписи и высоты столбцов под текущее предсказание без пересоздания фигуры'''
 
-                with open(path,'w') as f:
-                    f.write('Месяц;Температура\n')
-                    for month in range(0, 12):
-                        transfer = "" if month == 12 else "\n"
-                        f.write(f'{MONTHS_NAME[month]};{predicted_temperature[month]:.3f}{transfer}')
+        self.predict_subtitle.setText(PREDICT_WINDOW_SUBTITLE_TEMPLATE.format(self.predict_year))
+        for month_label, month, temp, bar in zip(self.month_labels, MONTHS_NAME, self.predicted_temperature, self.predict_bars):
+            month_label.setText(f"{month}: {temp:.1f}°C")
+            bar.set_height(temp)
 
-        save_result_button.clicked.connect(save_result)
+        # Пределы оси считаем сами: relim по столбцам заметно медленнее
+        bottom, top = min(0.0, float(np.min(self.predicted_temperature))), max(0.0, float(np.max(self.predicted_temperature)))
+        margin = (top - bottom) * 0.05 or 1.0
+        self.predict_axes.set_ylim(bottom - margin, top + margin)
+        self.predict_canvas.draw_idle()
 
-        layout.addWidget(save_result_button)
+    def save_prediction_result(self):
+        '''Сохраняет текущее предсказание в файл'''
+
+        path, _ = QFileDialog.getSaveFileName(None, SAVE_RESULT_WINDOW_TITLE, ".", "Txt/Csv (*.txt, *.csv)")
+
+        if path:
+            if (not str.endswith(path, ".txt")) and (not str.endswith(path, ".csv")):
+                path += ".txt"
+
+            with open(path,'w') as f:
+                f.write('Месяц;Температура\n')
+                for month in range(0, 12):
+                    transfer = "" if month == 12 else "\n"
+                    f.write(f'{MONTHS_NAME[month]};{self.predicted_temperature[month]:.3f}{transfer}')
 
     def open_year_dialog(self):
         '''Открывает диалог для выбора года.
@@ -507,18 +861,27 @@ class ResizableApp(QMainWindow):
 class HoverButton(QPushButton):
     '''Кнопка, которая изменяет иконку при наведении'''
 
+    # Иконки общие для всех кнопок, SVG читается один раз на путь
+    icons = {}
+
     def __init__(self, normal_icon_path, hover_icon_path, parent=None):
         super().__init__(parent)
         self.normal_icon_path = normal_icon_path
         self.hover_icon_path = hover_icon_path
-        self.setIcon(QIcon(self.normal_icon_path))
+        self.setIcon(self.get_icon(self.normal_icon_path))
+
+    @classmethod
+    def get_icon(cls, path):
+        if path not in cls.icons:
+            cls.icons[path] = QIcon(path)
+        return cls.icons[path]
 
     def enterEvent(self, event):
-        self.setIcon(QIcon(self.hover_icon_path))
+        self.setIcon(self.get_icon(self.hover_icon_path))
         super().enterEvent(event)
 
     def leaveEvent(self, event):
-        self.setIcon(QIcon(self.normal_icon_path))
+        self.setIcon(self.get_icon(self.normal_icon_path))
         super().leaveEvent(event)
 
 
@@ -554,8 +917,11 @@ class TrainDialog(MovableDialog):
     def __init__(self, parent, model_id):
         super().__init__(parent)
         self.model_id = model_id
+        self.checkpoint = get_checkpoint(model_id)
+        # Дообучать можно только уже обученную модель
+        self.can_train_incrementally = has_model_files(model_id)
         self.setWindowTitle(TRAIN_MODE_WINDOW_TITLE)
-        self.setFixedSize(380, 290)
+        self.setFixedSize(380, 400 + 30 * (self.checkpoint is not None) + 30 * self.can_train_incrementally)
         self.init_ui()
         if parent and hasattr(parent, "current_theme_style"):
             self.setStyleSheet(parent.current_theme_style)
@@ -606,6 +972,7 @@ class TrainDialog(MovableDialog):
 
         content_layout.addWidget(standard_radio)
         content_layout.addWidget(file_radio)
+        self.train_mode_radios = [standard_radio, file_radio]
 
         # Ввод количества эпох
         epochs_layout = QHBoxLayout()
@@ -618,6 +985,58 @@ class TrainDialog(MovableDialog):
         content_layout.addLayout(epochs_layout)
         content_layout.setSpacing(10)
 
+        # Ограничение времени обучения
+        time_budget_layout = QHBoxLayout()
+        self.time_budget_checkbox = QCheckBox(TIME_BUDGET_TITLE)
+        self.time_budget_checkbox.setObjectName("trainOptionCheckBox")
+        self.time_budget_input = QLineEdit(TIME_BUDGET_DEFAULT_VALUE)
+        self.time_budget_input.setObjectName("epochsInput")
+        self.time_budget_input.setEnabled(False)
+        self.time_budget_checkbox.toggled.connect(self.time_budget_input.setEnabled)
+        time_budget_layout.addWidget(self.time_budget_checkbox)
+        time_budget_layout.addWidget(self.time_budget_input)
+        content_layout.addLayout(time_budget_layout)
+
+        # Ранняя остановка
+        early_stopping_layout = QHBoxLayout()
+        self.early_stopping_checkbox = QCheckBox(EARLY_STOPPING_TITLE)
+        self.early_stopping_checkbox.setObjectName("trainOptionCheckBox")
+        self.patience_input = QLineEdit(EARLY_STOPPING_PATIENCE_DEFAULT_VALUE)
+        self.patience_input.setObjectName("epochsInput")
+        early_stopping_layout.addWidget(self.early_stopping_checkbox)
+        early_stopping_layout.addWidget(self.patience_input)
+        content_layout.addLayout(early_stopping_layout)
+
+        min_delta_layout = QHBoxLayout()
+        min_delta_label = QLabel(EARLY_STOPPING_MIN_DELTA_TITLE)
+        min_delta_label.setObjectName("epochsLabel")
+        self.min_delta_input = QLineEdit(EARLY_STOPPING_MIN_DELTA_DEFAULT_VALUE)
+        self.min_delta_input.setObjectName("epochsInput")
+        min_delta_layout.addWidget(min_delta_label)
+        min_delta_layout.addWidget(self.min_delta_input)
+        content_layout.addLayout(min_delta_layout)
+
+        self.patience_input.setEnabled(False)
+        self.min_delta_input.setEnabled(False)
+        self.early_stopping_checkbox.toggled.connect(self.patience_input.setEnabled)
+        self.early_stopping_checkbox.toggled.connect(self.min_delta_input.setEnabled)
+
+        # Дообучение на новых месяцах
+        self.incremental_checkbox = None
+        if self.can_train_incrementally:
+            self.incremental_checkbox = QCheckBox(INCREMENTAL_TRAIN_TITLE)
+            self.incremental_checkbox.setObjectName("trainOptionCheckBox")
+            content_layout.addWidget(self.incremental_checkbox)
+
+        # Продолжение прерванного обучения
+        self.resume_checkbox = None
+        if self.checkpoint is not None:
+            self.resume_checkbox = QCheckBox(RESUME_TRAIN_TITLE.format(self.checkpoint["epoch"], self.checkpoint["epochs"]))
+            self.resume_checkbox.setObjectName("trainOptionCheckBox")
+            self.resume_checkbox.toggled.connect(self.toggle_resume)
+            self.resume_checkbox.setChecked(True)
+            content_layout.addWidget(self.resume_checkbox)
+
         self.start_button = QPushButton(START_TRAIN_BUTTON_TEXT)
         self.start_button.setObjectName("startTrainButton")
         self.start_button.clicked.connect(self.push_train_button)
@@ -626,9 +1045,46 @@ class TrainDialog(MovableDialog):
         content_layout.addStretch()
         main_layout.addWidget(content_widget)
 
+    def toggle_resume(self, checked):
+        '''При продолжении обучения файл и количество эпох берутся из контрольной точки'''
+
+        for radio in self.train_mode_radios:
+            radio.setEnabled(not checked)
+        self.epochs_input.setEnabled(not checked)
+        if self.incremental_checkbox is not None:
+            self.incremental_checkbox.setEnabled(not checked)
+
+    def get_stop_options(self):
+        '''Возвращает параметры досрочной остановки обучения из полей диалога'''
+
+        options = {"time_budget": None, "patience": None, "min_delta": 0.0}
+
+        if self.time_budget_checkbox.isChecked() and self.time_budget_input.text().isdigit():
+            options["time_budget"] = int(self.time_budget_input.text())
+
+        if self.early_stopping_checkbox.isChecked() and self.patience_input.text().isdigit():
+            options["patience"] = int(self.patience_input.text())
+            try:
+                options["min_delta"] = float(self.min_delta_input.text().replace(",", "."))
+            except ValueError:
+                pass
+
+        return options
+
     def push_train_button(self):
         '''Запускает процесс обучения модели после нажатия на кнопку'''
 
+        if self.resume_checkbox is not None and self.resume_checkbox.isChecked():
+            for i in range(self.parent().tab_view.count()):
+                if i == 0:
+                    continue
+                tab = self.parent().tab_view.widget(i)
+                if tab.model_id == self.model_id:
+                    tab.start_training(self.checkpoint["filename"], self.checkpoint["epochs"], True, self.get_stop_options())
+                    break
+            self.accept()
+            return
+
         mode = self.mode_group.checkedId()
         filename = STANDARD_TRAIN_DATA_PATH if mode == 1 else None
 
@@ -650,7 +1106,9 @@ class TrainDialog(MovableDialog):
                 continue
             tab = self.parent().tab_view.widget(i)
             if tab.model_id == self.model_id:
-                tab.start_training(filename, int(self.epochs_input.text()) if self.epochs_input.text().isdigit() else 200)
+                epochs = int(self.epochs_input.text()) if self.epochs_input.text().isdigit() else 200
+                incremental = self.incremental_checkbox is not None and self.incremental_checkbox.isChecked()
+                tab.start_training(filename, epochs, stop_options=self.get_stop_options(), incremental=incremental)
                 break
         self.accept()
 
@@ -843,7 +1301,7 @@ class OpenModelDialog(QFileDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.FramelessWindowHint)
-        self.setNameFilter("Keras Model (*.keras);;All Files (*)")
+        self.setNameFilter(f"Models (*{MODEL_ARTIFACT_EXTENSION} *.keras);;All Files (*)")
         self.setWindowTitle(ADD_MODEL_WINDOW_TITLE)
 
     def mousePressEvent(self, event):
@@ -904,12 +1362,15 @@ class CustomTabBar(QTabBar):
 
 class App(ResizableApp):
 
-    def __init__(self):
+    def __init__(self, started_at=None):
         super().__init__()
 
+        self.started_at = started_at
+        self.first_paint_done = False
         self.current_theme = "misty_sunrise"
         self.current_theme_style = None
         self.open_dialogs = []
+        self.training_threads = {}
 
         self.setMaximumSize(WINDOW_MAX_WIDTH, WINDOW_MAX_HEIGHT)
 
@@ -1045,22 +1506,30 @@ class App(ResizableApp):
         models_layout = QVBoxLayout(models_tab)
         models_layout.setContentsMargins(0, 0, 0, 0)
 
-        # Карточки моделей
-        self.cards_widget = QWidget()
-        self.cards_widget.setObjectName("cardsWidget")
-        self.cards_layout = QGridLayout(self.cards_widget)
+        # Поиск по моделям
+        self.model_search_input = QLineEdit()
+        self.model_search_input.setObjectName("modelSearchInput")
+        self.model_search_input.setPlaceholderText(MODEL_SEARCH_PLACEHOLDER)
+        self.model_search_input.setClearButtonEnabled(True)
+        models_layout.addWidget(self.model_search_input)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setWidget(self.cards_widget)
-        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        models_layout.addWidget(self.scroll_area)
+        # Карточки моделей
+        self.catalog = ModelCatalog(self)
+        self.model_search_input.textChanged.connect(self.catalog.set_query)
+        models_layout.addWidget(self.catalog)
 
-        # Кнопка "Добавить модель"
+        # Кнопки "Добавить модель" и "Создать быструю модель" (оформлены одинаково)
+        add_buttons_layout = QHBoxLayout()
         self.add_model_button = QPushButton(LOAD_MODEL_WINDOW_TITLE)
         self.add_model_button.setObjectName("addModelButton")
         self.add_model_button.clicked.connect(self.add_model)
-        models_layout.addWidget(self.add_model_button)
+        add_buttons_layout.addWidget(self.add_model_button)
+
+        self.create_harmonic_button = QPushButton(CREATE_HARMONIC_MODEL_BUTTON_TEXT)
+        self.create_harmonic_button.setObjectName("addModelButton")
+        self.create_harmonic_button.clicked.connect(self.create_harmonic_model)
+        add_buttons_layout.addWidget(self.create_harmonic_button)
+        models_layout.addLayout(add_buttons_layout)
 
         self.tab_view.addTab(models_tab, MODELS_TAB_NAME)
         self.tab_view.setTabEnabled(0, True)
@@ -1069,47 +1538,66 @@ class App(ResizableApp):
         self.border_layout.addWidget(content_widget)
         main_layout.addWidget(self.border_widget)
 
-        # Добавляем старым моделям описание по умолчанию, если его не было
         self.models = get_models()
-        for model_id, model_data in self.models.items():
-            if model_id != STANDARD_MODEL_ID and "description" not in model_data:
-                model_data["description"] = DEFAULT_DESCRIPTION
-        save_models_metadata(self.models)
 
         self.current_theme = "misty_sunrise"
         self.update_background()
         self.draw_models_cards()
+        self.show_saved_weather_summary()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_done:
+            self.first_paint_done = True
+            QTimer.singleShot(0, self.on_first_paint)
+
+    def on_first_paint(self):
+        '''
+        Записывает время запуска и начинает считать прогноз на боковой панели в фоне.
+        Поток прогноза заодно загружает библиотеки машинного обучения
+        '''
+
+        if self.started_at is not None:
+            log_startup_time(time.perf_counter() - self.started_at)
+
         self.update_weather_summary()
 
+    def show_saved_weather_summary(self):
+        '''Показывает на боковой панели прогноз, сохраненный при прошлом запуске, пока считается новый'''
+
+        current_month = datetime.datetime.now().month
+        cached_temperature = load_weather_summary(current_month)
+        if cached_temperature is not None:
+            self.show_weather_summary(current_month, cached_temperature)
+
     def update_weather_summary(self):
+        '''Запускает расчет прогноза для боковой панели в фоновом потоке'''
+
+        current_month = datetime.datetime.now().month
+        self.forecast_worker = ForecastWorker(current_month)
+        self.forecast_worker.forecast_ready.connect(self.show_weather_summary)
+        threading.Thread(target=self.forecast_worker.run, daemon=True).start()
+
+    def show_weather_summary(self, month, temperature):
         '''
-        Обновляет температуру на боковой панели
+        Показывает прогноз на боковой панели
+                Параметры:
+                        month(int): номер месяца
+                        temperature(float): температура или None, если стандартная модель не готова
         '''
 
-        current_month = datetime.datetime.now().month
-        model, scaler_X, scaler_Y = get_model(STANDARD_MODEL_ID)
-        if model is None:
+        if temperature is None:
             self.weather_summary_label.setText(
                 WEATHER_SUMMARY_CANT_DISPLAY
             )
             self.temp_value_label.setText("N/A")
             return
 
-        test_year = 2025
-        test_input = np.array([[test_year, current_month]], dtype=np.float32)
-        test_input_scaled = test_input if scaler_X is None else scaler_X.transform(test_input)
-        predicted_temperature_scaled = model.predict(test_input_scaled, verbose=0)
-        predicted_temperature = (
-            predicted_temperature_scaled[0][0]
-            if scaler_Y is None
-            else scaler_Y.inverse_transform(predicted_temperature_scaled)[0][0]
-        )
-
-        month_name = MONTHS_NAME[current_month - 1]
+        month_name = MONTHS_NAME[month - 1]
         self.weather_summary_label.setText(
-            WEATHER_SUMMARY_LABEL_TEMPLATE.format(month_name)
+            WEATHER_SUMMARY_LABEL_TEMPLATE.format(month_name, WEATHER_SUMMARY_YEAR)
         )
-        self.temp_value_label.setText(f"{predicted_temperature:.1f}°C")
+        self.temp_value_label.setText(f"{temperature:.1f}°C")
 
     def update_background(self):
         '''Обновляет фон и применяет текущую тему'''
@@ -1130,7 +1618,6 @@ class App(ResizableApp):
         self.current_theme = themes[next_index]
         self.theme_name_label.setText(THEMES[self.current_theme][0])
         self.update_background()
-        self.draw_models_cards()
 
     def next_theme(self):
         themes = list(THEMES.keys())
@@ -1139,35 +1626,11 @@ class App(ResizableApp):
         self.current_theme = themes[next_index]
         self.theme_name_label.setText(THEMES[self.current_theme][0])
         self.update_background()
-        self.draw_models_cards()
 
     def draw_models_cards(self):
-        '''Рисует карточки'''
-
-        # Удаляем все карточки
-        while self.cards_layout.count():
-            item = self.cards_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-
-        # Вычисляем динамические отступы
-        container_width = self.width() 
-        container_height = self.height() 
-        num_cols = 3  # [?] Возможно стоит сделать количество колонок динамическим
-        num_rows = (len(self.models) + num_cols - 1) // num_cols
+        '''Обновляет каталог карточек по списку моделей'''
 
-        spacing = min(container_width // (num_cols + 1), container_height // (num_rows + 1)) // 5 # Считаем отступы
-        spacing = max(5, min(spacing, 20))  # Отступы будут от 5 до 20 пикселей
-
-        self.cards_layout.setHorizontalSpacing(spacing)
-        self.cards_layout.setVerticalSpacing(spacing)
-        self.cards_layout.setContentsMargins(spacing, spacing, spacing, spacing)
-
-        for row, (model_id, model_data) in enumerate(self.models.items()):
-            card = ModelCard(model_id, model_data, self)
-            col = row % num_cols
-            row = row // num_cols
-            self.cards_layout.addWidget(card, row, col)
+        self.catalog.set_models(self.models)
 
     def open_model_tab(self, model_id, is_training=True):
         '''Открывает вкладку модели'''
@@ -1184,8 +1647,13 @@ class App(ResizableApp):
                     self.tab_view.setCurrentIndex(i)
                     return
 
+            # Если модель обучается в фоне, возвращаем её закрытую вкладку
+            if model_id in self.training_threads:
+                tab = self.training_threads[model_id]["tab"]
+                tab.init_params(is_training)
             # Если нет, то создаем новую вкладку
-            tab = ModelTab(model_id, self.models[model_id], self, is_training)
+            else:
+                tab = ModelTab(model_id, self.models[model_id], self, is_training)
             self.tab_view.addTab(tab, self.models[model_id]["name"])
             self.tab_view.setCurrentIndex(self.tab_view.count() - 1)
 
@@ -1227,7 +1695,7 @@ class App(ResizableApp):
                             tab.model_data["description"] = new_desc if new_desc else DEFAULT_DESCRIPTION
                             tab.init_ui()
                             break
-                    save_models_metadata(self.models)
+                    update_model_record(model_id, name=new_name, description=self.models[model_id]["description"])
 
         return push_change_name
 
@@ -1236,6 +1704,12 @@ class App(ResizableApp):
 
         def push_train():
             self.open_model_tab(model_id)()
+
+            # Если модель уже обучается, просто показываем ход обучения
+            if model_id in self.training_threads:
+                self.training_threads[model_id]["tab"].init_ui()
+                return
+
             dialog = TrainDialog(self, model_id)
             self.open_dialogs.append(dialog)
             dialog.finished.connect(lambda: self.open_dialogs.remove(dialog))
@@ -1272,14 +1746,13 @@ class App(ResizableApp):
         '''Возвращает команду для удаления модели'''
 
         def push_delete():
+            # Обучение в фоне сохранило бы удаленную модель по окончании, поэтому удалять ее можно только после него
+            if model_id in self.training_threads:
+                QMessageBox.information(self, DELETE_MODEL_WINDOW_TITLE, DELETE_WHILE_TRAINING_TEXT.format(self.models[model_id]["name"]))
+                return
+
             del self.models[model_id]
-            for path in [
-                os.path.join(MODELS_DIRECTORY_PATH, model_id + ".keras"),
-                os.path.join(MODELS_DIRECTORY_PATH, "scaler_X" + model_id + ".keras"),
-                os.path.join(MODELS_DIRECTORY_PATH, "scaler_Y" + model_id + ".keras"),
-            ]:
-                if os.path.exists(path):
-                    os.remove(path)
+            delete_model(model_id)
 
             for i in range(self.tab_view.count()):
                 if i == 0:
@@ -1290,7 +1763,6 @@ class App(ResizableApp):
                     break
 
             self.draw_models_cards()
-            save_models_metadata(self.models)
 
         return push_delete
     
@@ -1306,18 +1778,17 @@ class App(ResizableApp):
 
         def push_save_model():
 
-            path, _ = QFileDialog.getSaveFileName(None, SAVE_MODEL_WINDOW_TITLE, ".", "models (*.keras);;All Files (*)")
+            path, _ = QFileDialog.getSaveFileName(
+                None, SAVE_MODEL_WINDOW_TITLE, ".", f"models (*{MODEL_ARTIFACT_EXTENSION});;Keras Model (*.keras)"
+            )
 
             if path:
-                model, scaler_X, scaler_Y = get_model(model_id)
-
-                dirname, fname = os.path.split(path)
-
-                if not str.endswith(fname, ".keras"):
-                    fname += ".keras"
-                model.save(os.path.join(dirname, fname))   
-                joblib.dump(scaler_X, os.path.join(dirname, "Scaler_X" + fname))   
-                joblib.dump(scaler_Y, os.path.join(dirname, "Scaler_Y" + fname))        
+                if not path.endswith((MODEL_ARTIFACT_EXTENSION, ".keras")):
+                    path += MODEL_ARTIFACT_EXTENSION
+                try:
+                    export_model(model_id, path)
+                except Exception as e:
+                    print(f"Ошибка при сохранении модели: {e}")
         
         return push_save_model
 
@@ -1332,9 +1803,7 @@ class App(ResizableApp):
             if filename:
                 try:
                     # Загружаем модель
-                    model = load_model(filename)
-                    new_id = str(uuid.uuid4())
-                    model.save(os.path.join(MODELS_DIRECTORY_PATH, new_id + ".keras"))
+                    new_id = import_model(filename)
 
                     # Запрашиваем имя модели
                     name_dialog = CustomInputDialog(self)
@@ -1346,16 +1815,36 @@ class App(ResizableApp):
                         new_name = name_dialog.textValue() or DEFAULT_MODEL_NAME
                         new_desc = name_dialog.descValue() or DEFAULT_DESCRIPTION
                     else:
+                        delete_model(new_id)
                         return
 
-                    # Сохраняем модель в словаре
-                    self.models[new_id] = {
-                        "name": new_name, 
-                        "description": new_desc
-                    }
+                    # Сохраняем имя и описание в реестре
+                    update_model_record(new_id, name=new_name, description=new_desc)
+                    self.models[new_id] = get_model_record(new_id)
 
                     self.draw_models_cards()
-                    save_models_metadata(self.models)
 
                 except Exception as e:
                     print(f"Ошибка при загрузке модели: {e}")
+
+    def create_harmonic_model(self):
+        '''Создает гармоническую модель, которая обучается без нейросети'''
+
+        name_dialog = CustomInputDialog(self)
+        name_dialog.setWindowTitle(CREATE_HARMONIC_MODEL_BUTTON_TEXT)
+        name_dialog.setLabelText(ADD_MODEL_NAME_TITLE)
+        name_dialog.setStyleSheet(self.current_theme_style)
+
+        if not name_dialog.exec():
+            return
+
+        try:
+            new_id = create_model(
+                name_dialog.textValue() or DEFAULT_MODEL_NAME,
+                name_dialog.descValue() or DEFAULT_HARMONIC_DESCRIPTION,
+                MODEL_TYPE_HARMONIC
+            )
+            self.models[new_id] = get_model_record(new_id)
+            self.draw_models_cards()
+        except Exception as e:
+            print(f"Ошибка при создании модели: {e}")